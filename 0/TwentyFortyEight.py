@@ -2,7 +2,6 @@
 Clone of 2048 game.
 """
 
-import poc_2048_gui
 import random
 
 # Directions, DO NOT MODIFY
@@ -63,7 +62,6 @@ class TwentyFortyEight:
         
         self._initial_tiles = {UP : up_initial, DOWN : down_initial,
                                LEFT : left_initial, RIGHT : right_initial}
-        print self._initial_tiles
         self.reset()
     def reset(self):
         """
@@ -75,15 +73,24 @@ class TwentyFortyEight:
         while index < self.get_grid_height():
             self._grid.append(list(line))
             index += 1
+        # Empty cells are kept in a list with a cell -> position index
+        # so they can be added, removed and sampled in O(1).
+        self._empty_squares = [(row, col)
+                               for row in range(self._grid_height)
+                               for col in range(self._grid_width)]
+        self._empty_index = dict((square, index) for index, square
+                                 in enumerate(self._empty_squares))
+        # Number of neighbouring tiles with equal values
+        self._equal_pairs = 0
     
     def __str__(self):
         """
         Return a string representation of the grid for debugging.
         """
         result = 'The Grid is:\n'
-        for line in self._grid:
-            for element in line:
-                result += (str(element) + '\t') 
+        for row in range(self.get_grid_height()):
+            for col in range(self.get_grid_width()):
+                result += (str(self.get_tile(row, col)) + '\t') 
             result += '\n'
         return result
 
@@ -130,23 +137,72 @@ class TwentyFortyEight:
         square.  The tile should be 2 90% of the time and
         4 10% of the time.
         """
-        empty_squares = []
-        for row in range(len(self._grid)):
-            for col in range(len(self._grid[row])):
-                if self._grid[row][col] == 0:
-                    empty_squares.append((row,col))
+        empty_squares = self._empty_squares
         if len(empty_squares) != 0:
             selected_square = empty_squares[int(len(empty_squares) * random.random())]
             random_number = 2
             if (random.random() < 0.1):
                 random_number = 4
-            self._grid[selected_square[0]][selected_square[1]] = random_number
+            self.set_tile(selected_square[0], selected_square[1], random_number)
+
     def set_tile(self, row, col, value):
         """
         Set the tile at position row, col to have the given value.
         """        
+        old_value = self._grid[row][col]
+        if old_value == value:
+            return
+        for (neighbor_row, neighbor_col) in ((row - 1, col), (row + 1, col),
+                                             (row, col - 1), (row, col + 1)):
+            if (0 <= neighbor_row < self._grid_height and
+                    0 <= neighbor_col < self._grid_width):
+                neighbor = self._grid[neighbor_row][neighbor_col]
+                if neighbor != 0:
+                    if neighbor == old_value:
+                        self._equal_pairs -= 1
+                    if neighbor == value:
+                        self._equal_pairs += 1
         self._grid[row][col] = value
-    
+        if old_value == 0:
+            self._remove_empty((row, col))
+        elif value == 0:
+            self._add_empty((row, col))
+
+    def _add_empty(self, square):
+        """
+        Record square as empty.
+        """
+        self._empty_index[square] = len(self._empty_squares)
+        self._empty_squares.append(square)
+
+    def _remove_empty(self, square):
+        """
+        Record square as filled by moving the last empty square
+        into its slot.
+        """
+        index = self._empty_index.pop(square)
+        last = self._empty_squares.pop()
+        if last != square:
+            self._empty_squares[index] = last
+            self._empty_index[last] = index
+
+    def get_empty_count(self):
+        """
+        Return the number of empty squares.
+        """
+        return len(self._empty_squares)
+
+    def can_move(self):
+        """
+        Return True if some direction would change the grid.
+
+        That is the case when two neighbouring tiles are equal, or
+        when the grid holds both tiles and empty squares.  Once it
+        is False the game is over.
+        """
+        if self._equal_pairs > 0:
+            return True
+        return 0 < len(self._empty_squares) < self._grid_height * self._grid_width
 
     def get_tile(self, row, col):
         """
@@ -155,4 +211,228 @@ class TwentyFortyEight:
         # replace with your code
         return self._grid[row][col]
 
-poc_2048_gui.run_gui(TwentyFortyEight(4, 4))
\ No newline at end of file
+    def get_state_key(self):
+        """
+        Return a hashable key for the grid that is the same for
+        all of its rotations and reflections.
+        """
+        grid = [tuple([self.get_tile(row, col)
+                       for col in range(self._grid_width)])
+                for row in range(self._grid_height)]
+        variants = [grid, [line[::-1] for line in grid]]
+        variants += [variant[::-1] for variant in variants]
+        if self._grid_height == self._grid_width:
+            variants += [zip(*variant) for variant in variants]
+        return min([tuple(variant) for variant in variants])
+
+
+# Packed 4x4 representation.  The whole board is a single integer of
+# sixteen 4-bit tile exponents: cell (row, col) lives in nibble
+# row * 4 + col, so every row is a 16-bit chunk with column 0 in its
+# lowest nibble.  Exponent 0 is an empty cell and 15 (32768) is the
+# largest tile that fits.
+PACKED_DIM = 4
+ROW_MASK = 0xFFFF
+CELL_MASK = 0xF
+
+def reverse_row(row):
+    """
+    Reverse the order of the four cells in a packed row.
+    """
+    return (((row & 0xF) << 12) | ((row & 0xF0) << 4) |
+            ((row >> 4) & 0xF0) | ((row >> 12) & 0xF))
+
+def _build_row_tables():
+    """
+    Merge every one of the 65536 possible packed rows once and
+    return the (left, right) lookup tables.
+    """
+    row_left = [0] * (ROW_MASK + 1)
+    row_right = [0] * (ROW_MASK + 1)
+    for row in range(ROW_MASK + 1):
+        line = []
+        for index in range(PACKED_DIM):
+            exponent = (row >> (4 * index)) & CELL_MASK
+            line.append(1 << exponent if exponent else 0)
+        result = 0
+        for index, value in enumerate(merge(line)):
+            exponent = value.bit_length() - 1 if value else 0
+            if exponent > CELL_MASK:
+                # two 32768 tiles would overflow the nibble, leave the row
+                result = row
+                break
+            result |= exponent << (4 * index)
+        row_left[row] = result
+        row_right[reverse_row(row)] = reverse_row(result)
+    return row_left, row_right
+
+ROW_LEFT, ROW_RIGHT = _build_row_tables()
+
+def transpose(board):
+    """
+    Transpose a packed board so that columns become rows.
+    """
+    part1 = board & 0xF0F00F0FF0F00F0F
+    part2 = board & 0x0000F0F00000F0F0
+    part3 = board & 0x0F0F00000F0F0000
+    board = part1 | (part2 << 12) | (part3 >> 12)
+    part1 = board & 0xFF00FF0000FF00FF
+    part2 = board & 0x00FF00FF00000000
+    part3 = board & 0x00000000FF00FF00
+    return part1 | (part2 >> 24) | (part3 << 24)
+
+def empty_shifts(board):
+    """
+    Return the bit offsets of the empty cells of a packed board.
+    """
+    return [shift for shift in range(0, 64, 4)
+            if (board >> shift) & CELL_MASK == 0]
+
+def mirror(board):
+    """
+    Mirror a packed board left to right.
+    """
+    return (reverse_row(board & ROW_MASK) |
+            (reverse_row((board >> 16) & ROW_MASK) << 16) |
+            (reverse_row((board >> 32) & ROW_MASK) << 32) |
+            (reverse_row((board >> 48) & ROW_MASK) << 48))
+
+def flip(board):
+    """
+    Flip a packed board top to bottom.
+    """
+    return (((board & ROW_MASK) << 48) |
+            (((board >> 16) & ROW_MASK) << 32) |
+            (((board >> 32) & ROW_MASK) << 16) |
+            (board >> 48))
+
+def canonical_board(board):
+    """
+    Return the smallest of the 8 rotations and reflections of a
+    packed board, so that equivalent boards share one key.
+    """
+    mirrored = mirror(board)
+    flipped = flip(board)
+    rotated = flip(mirrored)
+    return min(board, mirrored, flipped, rotated,
+               transpose(board), transpose(mirrored),
+               transpose(flipped), transpose(rotated))
+
+def _move_rows(board, table):
+    """
+    Replace every row of a packed board by its entry in table.
+    """
+    return (table[board & ROW_MASK] |
+            (table[(board >> 16) & ROW_MASK] << 16) |
+            (table[(board >> 32) & ROW_MASK] << 32) |
+            (table[(board >> 48) & ROW_MASK] << 48))
+
+def move_board(board, direction):
+    """
+    Return the packed board that results from sliding the
+    packed board in the given direction.  No tile is added.
+    """
+    if direction == LEFT:
+        return _move_rows(board, ROW_LEFT)
+    if direction == RIGHT:
+        return _move_rows(board, ROW_RIGHT)
+    if direction == UP:
+        return transpose(_move_rows(transpose(board), ROW_LEFT))
+    return transpose(_move_rows(transpose(board), ROW_RIGHT))
+
+class PackedTwentyFortyEight(TwentyFortyEight):
+    """
+    4x4 game that keeps the grid packed into a single integer
+    and moves with the precomputed row tables.  get_tile and
+    set_tile still work in tile values, so the GUI can use it
+    in place of TwentyFortyEight.
+    """
+
+    def __init__(self, grid_height = PACKED_DIM, grid_width = PACKED_DIM):
+        if grid_height != PACKED_DIM or grid_width != PACKED_DIM:
+            raise ValueError("packed board must be 4x4")
+        TwentyFortyEight.__init__(self, grid_height, grid_width)
+
+    def reset(self):
+        """
+        Reset the game so the grid is empty.
+        """
+        self._board = 0
+
+    def get_board(self):
+        """
+        Return the packed board.
+        """
+        return self._board
+
+    def set_board(self, board):
+        """
+        Replace the grid with the given packed board.
+        """
+        self._board = board
+
+    def get_state_key(self):
+        """
+        Return the canonical packed board.
+        """
+        return canonical_board(self._board)
+
+    def get_empty_count(self):
+        """
+        Return the number of empty squares.
+        """
+        return len(empty_shifts(self._board))
+
+    def can_move(self):
+        """
+        Return True if some direction would change the grid.
+        """
+        for direction in (UP, DOWN, LEFT, RIGHT):
+            if move_board(self._board, direction) != self._board:
+                return True
+        return False
+
+    def move(self, direction):
+        """
+        Move all tiles in the given direction and add
+        a new tile if any tiles moved.
+        """
+        board = move_board(self._board, direction)
+        if board != self._board:
+            self._board = board
+            self.new_tile()
+
+    def new_tile(self):
+        """
+        Create a new tile in a randomly selected empty 
+        square.  The tile should be 2 90% of the time and
+        4 10% of the time.
+        """
+        empty_squares = empty_shifts(self._board)
+        if len(empty_squares) != 0:
+            selected_square = empty_squares[int(len(empty_squares) * random.random())]
+            exponent = 1
+            if (random.random() < 0.1):
+                exponent = 2
+            self._board |= exponent << selected_square
+
+    def set_tile(self, row, col, value):
+        """
+        Set the tile at position row, col to have the given value.
+        """
+        shift = 4 * (row * PACKED_DIM + col)
+        exponent = value.bit_length() - 1 if value else 0
+        self._board = (self._board & ~(CELL_MASK << shift)) | (exponent << shift)
+
+    def get_tile(self, row, col):
+        """
+        Return the value of the tile at position row, col.
+        """
+        exponent = (self._board >> (4 * (row * PACKED_DIM + col))) & CELL_MASK
+        if exponent == 0:
+            return 0
+        return 1 << exponent
+
+if __name__ == "__main__":
+    import poc_2048_gui
+    poc_2048_gui.run_gui(TwentyFortyEight(4, 4))
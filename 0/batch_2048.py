@@ -0,0 +1,159 @@
+"""
+Batched 2048 stepping with NumPy.
+
+A batch is a (K, H, W) uint8 array of tile exponents (0 is an empty
+cell, 1 is a 2, 2 is a 4, ...), so K games advance together with a
+handful of array operations instead of per-tile Python loops.
+"""
+
+import numpy as np
+
+from TwentyFortyEight import UP, DOWN, LEFT, RIGHT
+
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+
+
+def from_game(game):
+    """
+    Return the (H, W) exponent grid of a TwentyFortyEight game.
+    """
+    grid = np.zeros((game.get_grid_height(), game.get_grid_width()),
+                    dtype = np.uint8)
+    for row in range(game.get_grid_height()):
+        for col in range(game.get_grid_width()):
+            value = game.get_tile(row, col)
+            if value:
+                grid[row, col] = value.bit_length() - 1
+    return grid
+
+def to_game(grid, game):
+    """
+    Copy an (H, W) exponent grid into a TwentyFortyEight game.
+    """
+    for row in range(grid.shape[0]):
+        for col in range(grid.shape[1]):
+            exponent = int(grid[row, col])
+            game.set_tile(row, col, 1 << exponent if exponent else 0)
+
+def new_boards(count, grid_height, grid_width, rng):
+    """
+    Return count empty boards with the two starting tiles placed.
+    """
+    boards = np.zeros((count, grid_height, grid_width), dtype = np.uint8)
+    spawn(boards, rng)
+    spawn(boards, rng)
+    return boards
+
+def _compact(lines):
+    """
+    Slide the tiles of every line to the left, keeping their order.
+    """
+    order = np.argsort(lines == 0, axis = 1, kind = "mergesort")
+    return lines[np.arange(lines.shape[0])[:, None], order]
+
+def merge_lines(lines):
+    """
+    Merge an (N, L) array of exponent lines to the left, the same
+    way merge does for a single line of tile values.
+    """
+    lines = _compact(lines)
+    for col in range(lines.shape[1] - 1):
+        same = (lines[:, col] != 0) & (lines[:, col] == lines[:, col + 1])
+        lines[same, col] += 1
+        lines[same, col + 1] = 0
+    return _compact(lines)
+
+def _orient(boards, direction):
+    """
+    Return a view of boards in which direction is a move to the left.
+    The same call undoes it.
+    """
+    if direction == RIGHT:
+        return boards[:, :, ::-1]
+    if direction == UP:
+        return boards.transpose(0, 2, 1)
+    if direction == DOWN:
+        return boards.transpose(0, 2, 1)[:, :, ::-1]
+    return boards
+
+def _unorient(boards, direction):
+    """
+    Inverse of _orient.
+    """
+    if direction == DOWN:
+        return boards[:, :, ::-1].transpose(0, 2, 1)
+    return _orient(boards, direction)
+
+def move(boards, directions):
+    """
+    Slide every board in its own direction.  No tile is added.
+
+    boards: (K, H, W) uint8 exponent array
+    directions: length K array of UP, DOWN, LEFT or RIGHT
+
+    Returns (moved boards, changed) where changed is a length K
+    boolean array marking the boards that actually moved.
+    """
+    directions = np.asarray(directions)
+    moved = boards.copy()
+    for direction in DIRECTIONS:
+        index = np.nonzero(directions == direction)[0]
+        if len(index) == 0:
+            continue
+        view = _orient(boards[index], direction)
+        shape = view.shape
+        lines = merge_lines(view.reshape(-1, shape[2]))
+        moved[index] = _unorient(lines.reshape(shape), direction)
+    changed = (moved != boards).reshape(len(boards), -1).any(axis = 1)
+    return moved, changed
+
+def spawn(boards, rng, mask = None):
+    """
+    Add a tile to a random empty cell of every board selected by
+    mask (all boards by default), in place; boards may be any view
+    of a (K, H, W) array.  The tile is a 2 90% of the time and a 4
+    10% of the time.  rng is a NumPy Generator or RandomState, and
+    all draws come from a single call to it.
+    """
+    count = len(boards)
+    flat = boards.reshape(count, -1)
+    empty = flat == 0
+    num_empty = empty.sum(axis = 1)
+    if hasattr(rng, "random"):
+        draws = rng.random((count, 2))
+    else:
+        # RandomState before NumPy 1.17
+        draws = rng.random_sample((count, 2))
+    select = num_empty > 0
+    if mask is not None:
+        select &= mask
+    pick = (draws[:, 0] * num_empty).astype(np.int64)
+    cell = np.argmax(np.cumsum(empty, axis = 1) > pick[:, None], axis = 1)
+    exponent = np.where(draws[:, 1] < 0.1, 2, 1).astype(np.uint8)
+    rows = np.nonzero(select)[0]
+    # Write through boards itself: flat is a copy when boards is not
+    # contiguous
+    cell_rows, cell_cols = np.unravel_index(cell[rows], boards.shape[1:])
+    boards[rows, cell_rows, cell_cols] = exponent[rows]
+
+def step(boards, directions, rng):
+    """
+    Move every board and add a tile to the boards that changed.
+
+    Returns (new boards, changed).
+    """
+    moved, changed = move(boards, directions)
+    spawn(moved, rng, changed)
+    return moved, changed
+
+def legal_moves(boards):
+    """
+    Return a (K, 4) boolean array telling which of DIRECTIONS
+    change each board.  A board with no legal move is lost.
+    """
+    count = len(boards)
+    legal = np.zeros((count, len(DIRECTIONS)), dtype = bool)
+    for index, direction in enumerate(DIRECTIONS):
+        dummy_moved, legal[:, index] = move(boards, np.repeat(direction,
+                                                              count))
+    return legal
@@ -0,0 +1,208 @@
+"""
+Expectimax player for 2048.
+
+The search works on packed boards from TwentyFortyEight: max nodes
+try the four moves and chance nodes average over a 2 (90%) or a 4
+(10%) appearing in each empty cell.  It deepens one move at a time
+until the per-move deadline and keeps the answer of the deepest
+search that finished.  The transposition table is keyed by the
+canonical board, so the 8 rotations and reflections of a position
+share one entry.
+"""
+
+import time
+
+from TwentyFortyEight import (UP, DOWN, LEFT, RIGHT, ROW_MASK, CELL_MASK,
+                              transpose, move_board, canonical_board,
+                              empty_shifts)
+
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+
+# Heuristic weights for one packed row
+SCORE_LOST_PENALTY = 200000.0
+SCORE_MONOTONICITY_POWER = 4.0
+SCORE_MONOTONICITY_WEIGHT = 47.0
+SCORE_SUM_POWER = 3.5
+SCORE_SUM_WEIGHT = 11.0
+SCORE_MERGES_WEIGHT = 700.0
+SCORE_EMPTY_WEIGHT = 270.0
+
+def _row_heuristic(row):
+    """
+    Score a packed row: reward empty cells, possible merges and
+    monotonic rows, penalize big tiles away from the edge.
+
+    The score is the same for a row and its reverse, so a board
+    scores the same under all its rotations and reflections.
+    """
+    rank = [(row >> (4 * index)) & CELL_MASK for index in range(4)]
+    sum_pow = 0.0
+    empty = 0
+    merges = 0
+    previous = 0
+    counter = 0
+    for value in rank:
+        sum_pow += value ** SCORE_SUM_POWER
+        if value == 0:
+            empty += 1
+        else:
+            if previous == value:
+                counter += 1
+            elif counter > 0:
+                merges += 1 + counter
+                counter = 0
+            previous = value
+    if counter > 0:
+        merges += 1 + counter
+
+    monotonicity_left = 0.0
+    monotonicity_right = 0.0
+    for index in range(1, 4):
+        left = rank[index - 1] ** SCORE_MONOTONICITY_POWER
+        right = rank[index] ** SCORE_MONOTONICITY_POWER
+        if rank[index - 1] > rank[index]:
+            monotonicity_left += left - right
+        else:
+            monotonicity_right += right - left
+
+    return (SCORE_LOST_PENALTY + SCORE_EMPTY_WEIGHT * empty +
+            SCORE_MERGES_WEIGHT * merges -
+            SCORE_MONOTONICITY_WEIGHT * min(monotonicity_left,
+                                            monotonicity_right) -
+            SCORE_SUM_WEIGHT * sum_pow)
+
+ROW_HEURISTIC = [_row_heuristic(row) for row in range(ROW_MASK + 1)]
+
+def heuristic(board):
+    """
+    Score a packed board as the sum of its rows and columns.
+    """
+    columns = transpose(board)
+    return (ROW_HEURISTIC[board & ROW_MASK] +
+            ROW_HEURISTIC[(board >> 16) & ROW_MASK] +
+            ROW_HEURISTIC[(board >> 32) & ROW_MASK] +
+            ROW_HEURISTIC[(board >> 48) & ROW_MASK] +
+            ROW_HEURISTIC[columns & ROW_MASK] +
+            ROW_HEURISTIC[(columns >> 16) & ROW_MASK] +
+            ROW_HEURISTIC[(columns >> 32) & ROW_MASK] +
+            ROW_HEURISTIC[(columns >> 48) & ROW_MASK])
+
+
+class _Timeout(Exception):
+    """
+    Raised inside the search when the move deadline has passed.
+    """
+    pass
+
+
+class ExpectimaxPlayer:
+    """
+    Expectimax search with a transposition table and a per-move
+    deadline.  Instances can be used as selfplay policies.
+    """
+
+    def __init__(self, deadline_ms = 50, max_depth = 6,
+                 min_probability = 0.0001):
+        """
+        deadline_ms: time budget for one move in milliseconds
+        max_depth: deepest search, in moves, ever started
+        min_probability: chance branches reached with a smaller
+        cumulative probability are scored by the heuristic
+        """
+        self._deadline_ms = deadline_ms
+        self._max_depth = max_depth
+        self._min_probability = min_probability
+        self._table = {}
+        self._deadline = None
+        self._nodes = 0
+        self._hits = 0
+        self._depth = 0
+
+    def __call__(self, game, moves, rng):
+        """
+        Policy interface for selfplay.run_batch.
+        """
+        return self.get_move(game.get_board())
+
+    def get_stats(self):
+        """
+        Return (nodes searched, table hits, depth completed) for the
+        last move.
+        """
+        return (self._nodes, self._hits, self._depth)
+
+    def get_move(self, board):
+        """
+        Return the best direction for a packed board, or None if
+        no move changes it.
+        """
+        self._table = {}
+        self._nodes = 0
+        self._hits = 0
+        self._depth = 0
+        moves = []
+        for direction in DIRECTIONS:
+            moved = move_board(board, direction)
+            if moved != board:
+                moves.append((direction, moved))
+        if not moves:
+            return None
+
+        best_move = max(moves, key = lambda move: heuristic(move[1]))[0]
+        self._deadline = time.time() + self._deadline_ms / 1000.0
+        try:
+            for depth in range(1, self._max_depth + 1):
+                best_value = float('-inf')
+                for direction, moved in moves:
+                    value = self._chance_node(moved, depth - 1, 1.0)
+                    if value > best_value:
+                        best_value = value
+                        depth_move = direction
+                best_move = depth_move
+                self._depth = depth
+        except _Timeout:
+            pass
+        return best_move
+
+    def _max_node(self, board, depth, probability):
+        """
+        Return the value of board with the player to move.
+        """
+        self._nodes += 1
+        if time.time() > self._deadline:
+            raise _Timeout()
+        best_value = 0.0
+        for direction in DIRECTIONS:
+            moved = move_board(board, direction)
+            if moved != board:
+                best_value = max(best_value,
+                                 self._chance_node(moved, depth, probability))
+        return best_value
+
+    def _chance_node(self, board, depth, probability):
+        """
+        Return the expected value of board before a tile appears.
+        """
+        if depth == 0 or probability < self._min_probability:
+            return heuristic(board)
+        key = canonical_board(board)
+        entry = self._table.get(key)
+        if entry is not None and entry[0] >= depth:
+            self._hits += 1
+            return entry[1]
+
+        shifts = empty_shifts(board)
+        probability /= len(shifts)
+        total = 0.0
+        for shift in shifts:
+            total += 0.9 * self._max_node(board | (1 << shift), depth - 1,
+                                          probability * 0.9)
+            total += 0.1 * self._max_node(board | (2 << shift), depth - 1,
+                                          probability * 0.1)
+        value = total / len(shifts)
+        self._table[key] = (depth, value)
+        return value
+
+if __name__ == "__main__":
+    import selfplay
+    print selfplay.format_report(selfplay.run_batch(ExpectimaxPlayer(), 4))
@@ -0,0 +1,200 @@
+"""
+Headless batch self-play for 2048.
+
+A policy is any function policy(game, moves, rng) that returns one
+of the directions in moves.  game is a PackedTwentyFortyEight, moves
+is the list of directions that change the board and rng is a
+random.Random owned by the worker playing the game.
+"""
+
+import multiprocessing
+import random
+import sys
+import time
+
+from TwentyFortyEight import (UP, DOWN, LEFT, RIGHT,
+                              PackedTwentyFortyEight, move_board)
+
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+
+# Bits that are set in a packed cell only when it holds a 4
+FOUR_BITS = 0x2222222222222222
+
+
+def random_policy(game, moves, rng):
+    """
+    Pick any legal move.
+    """
+    return rng.choice(moves)
+
+def corner_policy(game, moves, rng):
+    """
+    Keep the big tiles in the upper left corner: prefer up,
+    then left, then right, and only go down when forced.
+    """
+    for direction in (UP, LEFT, RIGHT, DOWN):
+        if direction in moves:
+            return direction
+
+def final_score(board, fours):
+    """
+    Return the game score of a packed board.
+
+    Every tile 2^e was built by merges worth (e - 1) * 2^e in
+    total, except that spawned 4s were never merged.
+    """
+    score = 0
+    while board:
+        exponent = board & 0xF
+        if exponent > 1:
+            score += (exponent - 1) << exponent
+        board >>= 4
+    return score - 4 * fours
+
+def max_tile(board):
+    """
+    Return the value of the largest tile on a packed board.
+    """
+    exponent = 0
+    while board:
+        exponent = max(exponent, board & 0xF)
+        board >>= 4
+    return 1 << exponent if exponent else 0
+
+def play_game(policy, rng):
+    """
+    Play one game to the end with the given policy.
+
+    Returns a tuple (score, max tile, number of moves).
+    """
+    game = PackedTwentyFortyEight()
+    game.new_tile()
+    game.new_tile()
+    fours = bin(game.get_board() & FOUR_BITS).count("1")
+    num_moves = 0
+    while True:
+        board = game.get_board()
+        results = {}
+        for direction in DIRECTIONS:
+            moved = move_board(board, direction)
+            if moved != board:
+                results[direction] = moved
+        if not results:
+            break
+        direction = policy(game, [d for d in DIRECTIONS if d in results], rng)
+        game.move(direction)
+        if (game.get_board() ^ results[direction]) & FOUR_BITS:
+            fours += 1
+        num_moves += 1
+    board = game.get_board()
+    return (final_score(board, fours), max_tile(board), num_moves)
+
+def mix_seed(*values):
+    """
+    Combine integers into one 32-bit seed that is the same in every
+    process and every run.
+    """
+    seed = 0
+    for value in values:
+        seed = (seed * 1000003 + value) & 0xFFFFFFFF
+    return seed
+
+def _play_chunk(task):
+    """
+    Play a chunk of games in one worker.
+
+    The global random module drives tile spawns and the returned
+    rng drives the policy, both seeded from the chunk seed.
+    """
+    policy, num_games, seed = task
+    random.seed(seed)
+    rng = random.Random(seed)
+    return [play_game(policy, rng) for dummy_idx in range(num_games)]
+
+def percentile(values, pct):
+    """
+    Return the nearest-rank percentile of a sorted list.
+    """
+    if not values:
+        return None
+    rank = int(round(pct / 100.0 * (len(values) - 1)))
+    return values[rank]
+
+def run_batch(policy, num_games, num_workers = None, seed = 0):
+    """
+    Play num_games games with policy spread over a process pool.
+
+    Games are split into one chunk per worker and every chunk has
+    its own seed, so a batch is reproducible for a given seed and
+    worker count.  num_workers = 1 plays in this process and leaves
+    the state of the global random module as it was.
+
+    Returns a dictionary of throughput and result statistics.
+    """
+    if num_workers is None:
+        num_workers = multiprocessing.cpu_count()
+    num_workers = max(1, min(num_workers, num_games))
+    tasks = []
+    for index in range(num_workers):
+        chunk = num_games // num_workers
+        if index < num_games % num_workers:
+            chunk += 1
+        tasks.append((policy, chunk, mix_seed(seed, index)))
+
+    start = time.time()
+    if num_workers == 1:
+        # The chunk reseeds the global random module; keep the caller's state
+        state = random.getstate()
+        try:
+            chunks = [_play_chunk(task) for task in tasks]
+        finally:
+            random.setstate(state)
+    else:
+        pool = multiprocessing.Pool(num_workers)
+        try:
+            chunks = pool.map(_play_chunk, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    elapsed = max(time.time() - start, 1e-9)
+
+    results = [result for chunk in chunks for result in chunk]
+    scores = sorted(result[0] for result in results)
+    total_moves = sum(result[2] for result in results)
+    tiles = {}
+    for result in results:
+        tiles[result[1]] = tiles.get(result[1], 0) + 1
+    return {"games": len(results),
+            "moves": total_moves,
+            "seconds": elapsed,
+            "games_per_sec": len(results) / elapsed,
+            "moves_per_sec": total_moves / elapsed,
+            "max_tiles": tiles,
+            "mean_score": float(sum(scores)) / max(len(scores), 1),
+            "score_percentiles": dict((pct, percentile(scores, pct))
+                                      for pct in PERCENTILES)}
+
+def format_report(stats):
+    """
+    Return a human readable summary of run_batch statistics.
+    """
+    lines = ["Games:\t\t%d in %.2fs" % (stats["games"], stats["seconds"]),
+             "Games/sec:\t%.1f" % stats["games_per_sec"],
+             "Moves/sec:\t%.1f" % stats["moves_per_sec"],
+             "Mean score:\t%.1f" % stats["mean_score"],
+             "Score percentiles:"]
+    for pct in PERCENTILES:
+        lines.append("\tp%d\t%s" % (pct, stats["score_percentiles"][pct]))
+    lines.append("Max tiles:")
+    for tile in sorted(stats["max_tiles"]):
+        count = stats["max_tiles"][tile]
+        lines.append("\t%d\t%d (%.1f%%)" % (tile, count,
+                                            100.0 * count / stats["games"]))
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    NUM_GAMES = 1000
+    if len(sys.argv) > 1:
+        NUM_GAMES = int(sys.argv[1])
+    print format_report(run_batch(random_policy, NUM_GAMES))
@@ -2,8 +2,22 @@
 Cookie Clicker Simulator Build Information
 """
 
+from array import array
+import copy
+
 BUILD_GROWTH = 1.15
 
+DEFAULT_BUILD_INFO = {"Cursor": [15.0, 0.1],
+                      "Grandma": [100.0, 0.5],
+                      "Farm": [500.0, 4.0],
+                      "Factory": [3000.0, 10.0],
+                      "Mine": [10000.0, 40.0],
+                      "Shipment": [40000.0, 100.0],
+                      "Alchemy Lab": [200000.0, 400.0],
+                      "Portal": [1666666.0, 6666.0],
+                      "Time Machine": [123456789.0, 98765.0],
+                      "Antimatter Condenser": [3999999999.0, 999999.0]}
+
 class BuildInfo:
     """
     Class to track build information.
@@ -12,20 +26,10 @@ class BuildInfo:
     def __init__(self, build_info = None, growth_factor = BUILD_GROWTH):
         self._build_growth = growth_factor
         if build_info == None:
-            self._info = {"Cursor": [15.0, 0.1],
-                          "Grandma": [100.0, 0.5],
-                          "Farm": [500.0, 4.0],
-                          "Factory": [3000.0, 10.0],
-                          "Mine": [10000.0, 40.0],
-                          "Shipment": [40000.0, 100.0],
-                          "Alchemy Lab": [200000.0, 400.0],
-                          "Portal": [1666666.0, 6666.0],
-                          "Time Machine": [123456789.0, 98765.0],
-                          "Antimatter Condenser": [3999999999.0, 999999.0]}
-        else:
-            self._info = {}
-            for key, value in build_info.items():
-                self._info[key] = list(value)
+            build_info = DEFAULT_BUILD_INFO
+        self._info = {}
+        for key, value in build_info.items():
+            self._info[key] = list(value)
             
     def build_items(self):
         """
@@ -59,4 +63,76 @@ class BuildInfo:
         """
         Return a clone of this BuildInfo
         """
-        return BuildInfo(self._info, self._build_growth)
\ No newline at end of file
+        return BuildInfo(self._info, self._build_growth)
+
+
+class ArrayBuildInfo:
+    """
+    Build information with the same interface as BuildInfo, kept in
+    parallel array('d') buffers of costs and CPS.  Items keep the
+    order BuildInfo.build_items gives for the same table, so
+    strategies that break ties by scan order pick the same items with
+    either class.  A clone shares the buffers with its original and only
+    copies the costs the first time either of them updates an item;
+    CPS values never change and stay shared.
+    """
+
+    def __init__(self, build_info = None, growth_factor = BUILD_GROWTH):
+        self._build_growth = growth_factor
+        if build_info == None:
+            build_info = DEFAULT_BUILD_INFO
+        # Fill a dictionary the way BuildInfo does to get its order
+        info = {}
+        for key, value in build_info.items():
+            info[key] = value
+        self._items = tuple(info.keys())
+        self._index = dict((item, index) for index, item in enumerate(self._items))
+        self._costs = array('d', [build_info[item][0] for item in self._items])
+        self._cps = array('d', [build_info[item][1] for item in self._items])
+        self._shared = False
+
+    def build_items(self):
+        """
+        Get a list of buildable items
+        """
+        return list(self._items)
+
+    def get_cost(self, item):
+        """
+        Get the current cost of an item
+        Will throw a KeyError exception if item is not in the build info.
+        """
+        return self._costs[self._index[item]]
+
+    def get_cps(self, item):
+        """
+        Get the current CPS of an item
+        Will throw a KeyError exception if item is not in the build info.
+        """
+        return self._cps[self._index[item]]
+
+    def get_costs_and_cps(self):
+        """
+        Get (items, costs, cps) for all items at once, where costs[i]
+        and cps[i] belong to items[i].  The arrays are the live
+        buffers and must not be modified.
+        """
+        return (self._items, self._costs, self._cps)
+
+    def update_item(self, item):
+        """
+        Update the cost of an item by the growth factor
+        Will throw a KeyError exception if item is not in the build info.
+        """
+        index = self._index[item]
+        if self._shared:
+            self._costs = array('d', self._costs)
+            self._shared = False
+        self._costs[index] *= self._build_growth
+
+    def clone(self):
+        """
+        Return a clone of this ArrayBuildInfo
+        """
+        self._shared = True
+        return copy.copy(self)
@@ -1,30 +1,35 @@
 
 """
 Cookie Clicker Simulator
-"""
-import simpleplot
- 
-# Used to increase the timeout, if necessary
-import codeskulptor
-codeskulptor.set_timeout(10)
 
-import poc_clicker_provided as provided
+The CodeSkulptor modules are imported by run_strategy and run, so the
+simulator itself also loads under CPython (see sweep.py).
+"""
 import math
 
 # Constants
 SIM_TIME = 10000000000.0
 
+# Pass as keep_history to record purchases in a ColumnarHistory
+COLUMNAR_HISTORY = "columnar"
+
 class ClickerState:
     """
     Simple class to keep track of the game state.
     """
     
-    def __init__(self):
+    def __init__(self, keep_history = True):
         self._total_cookies_produced = 0.0
         self._current_cookies = 0.0
         self._current_time = 0.0
         self._current_cps = 1.0
-        self._history = [(0.0,None,0.0,0.0)]
+        self._keep_history = keep_history
+        if keep_history == COLUMNAR_HISTORY:
+            import clicker_history
+            self._history = clicker_history.ColumnarHistory()
+            self._history.append((0.0,None,0.0,0.0))
+        else:
+            self._history = [(0.0,None,0.0,0.0)]
     def __str__(self):
         """
         Return human readable state
@@ -52,6 +57,14 @@ class ClickerState:
         """
         return self._current_cps
     
+    def get_total_cookies(self):
+        """
+        Get total number of cookies produced so far
+
+        Should return a float
+        """
+        return self._total_cookies_produced
+
     def get_time(self):
         """
         Get current time
@@ -68,6 +81,11 @@ class ClickerState:
         (time, item, cost of item, total cookies)
 
         For example: (0.0, None, 0.0, 0.0)
+
+        Only the initial entry is present if the state was created
+        with keep_history = False.  With keep_history = COLUMNAR_HISTORY
+        it is a clicker_history.ColumnarHistory, which can be indexed
+        and iterated the same way.
         """
     
         return self._history
@@ -102,19 +120,23 @@ class ClickerState:
         if self._current_cookies >= cost:
             self._current_cookies -= cost
             self._current_cps += additional_cps
-            self._history.append((self._current_time, item_name, cost, self._total_cookies_produced))
+            if self._keep_history:
+                self._history.append((self._current_time, item_name, cost, self._total_cookies_produced))
             
    
     
-def simulate_clicker(build_info, duration, strategy):
+def simulate_clicker(build_info, duration, strategy, keep_history = True):
     """
     Function to run a Cookie Clicker game for the given
     duration with the given strategy.  Returns a ClickerState
     object corresponding to game.
+
+    keep_history = False skips recording the purchase history and
+    COLUMNAR_HISTORY records it in a ColumnarHistory.
     """
     build = build_info.clone()
    # print build.build_items()
-    state = ClickerState()
+    state = ClickerState(keep_history)
     while state.get_time() < duration:
         item = strategy(state.get_cookies(), state.get_cps(), duration - state.get_time(), build)
         if item == None:
@@ -138,6 +160,18 @@ def simulate_clicker(build_info, duration, strategy):
     return state
 
 
+def item_table(build_info):
+    """
+    Return (items, costs, cps) for every buildable item, using the
+    bulk accessor of the build info when it has one.
+    """
+    if hasattr(build_info, "get_costs_and_cps"):
+        return build_info.get_costs_and_cps()
+    items = build_info.build_items()
+    return (items,
+            [build_info.get_cost(item) for item in items],
+            [build_info.get_cps(item) for item in items])
+
 def strategy_cursor(cookies, cps, time_left, build_info):
     """
     Always pick Cursor!
@@ -163,13 +197,13 @@ def strategy_cheap(cookies, cps, time_left, build_info):
     return the cheapest item afforded or will be afforded in time ('time_left') with constant producing rate 'cps'
     """
     
-    item_list = build_info.build_items()
+    item_list, item_costs, dummy_cps = item_table(build_info)
     cost = float('inf')
-    for item in item_list:
+    for index in range(len(item_list)):
        # print item, build_info.get_cost(item), cost
-        if build_info.get_cost(item) < cost:
-            cost = build_info.get_cost(item)
-            cheapest_item = item
+        if item_costs[index] < cost:
+            cost = item_costs[index]
+            cheapest_item = item_list[index]
     if cookies + cps * time_left >= cost: 
         return cheapest_item
 
@@ -177,14 +211,14 @@ def strategy_expensive(cookies, cps, time_left, build_info):
     """
     return the most expensive item afforded or will be afforded in time ('time_left') with constant producing rate 'cps'  
     """
-    item_list = build_info.build_items()
+    item_list, item_costs, dummy_cps = item_table(build_info)
     cost = float('-inf')
     expensive_item = None
     afford_cost = cookies + cps * time_left
-    for item in item_list:
-        item_cost = build_info.get_cost(item)
+    for index in range(len(item_list)):
+        item_cost = item_costs[index]
         if item_cost <= afford_cost and item_cost >= cost:
-            expensive_item = item
+            expensive_item = item_list[index]
             cost = item_cost
     return expensive_item
 
@@ -192,13 +226,14 @@ def strategy_best(cookies, cps, time_left, build_info):
     """
     return the afforded item will make the most cookies in time ('time left')
     """
-    item_list = build_info.build_items()
+    item_list, item_costs, item_cps = item_table(build_info)
     best_item = None
     most_extra_cookies = float('-inf')
     cps_acceleration = float('-inf')
-    for item in item_list:
-        item_cost = build_info.get_cost(item)
-        item_additional_cps = build_info.get_cps(item)
+    for index in range(len(item_list)):
+        item = item_list[index]
+        item_cost = item_costs[index]
+        item_additional_cps = item_cps[index]
         afford_time = min(time_left, max(0,(item_cost - cookies) / cps))
         extra_cookies = (time_left - afford_time) * item_additional_cps 
         if extra_cookies > most_extra_cookies and extra_cookies > 0 and item_additional_cps / item_cost  > cps_acceleration:
@@ -212,6 +247,9 @@ def run_strategy(strategy_name, time, strategy):
     """
     Run a simulation with one strategy
     """
+    import simpleplot
+    import poc_clicker_provided as provided
+
     state = simulate_clicker(provided.BuildInfo(), time, strategy)
     print strategy_name, ":", state
     # Plot total cookies over time
@@ -224,10 +262,18 @@ def run_strategy(strategy_name, time, strategy):
     #history = [(item[0], item[3]) for item in history]
     #simpleplot.plot_lines(strategy_name, 1000, 400, 'Time', 'Total Cookies', [history], True)
 
+    # With a columnar history, plot a downsampled trace instead
+    #state = simulate_clicker(provided.BuildInfo(), time, strategy, keep_history = COLUMNAR_HISTORY)
+    #simpleplot.plot_lines(strategy_name, 1000, 400, 'Time', 'Total Cookies', [state.get_history().downsample(1000)], True)
+
 def run():
     """
     Run the simulator.
     """    
+    # Used to increase the timeout, if necessary
+    import codeskulptor
+    codeskulptor.set_timeout(10)
+
     #run_strategy("Cursor", SIM_TIME, strategy_cursor)
 
     # Add calls to run_strategy to run additional strategies
@@ -236,5 +282,6 @@ def run():
     run_strategy("Best", SIM_TIME, strategy_best)
 
     
-run()
+if __name__ == "__main__":
+    run()
 
@@ -0,0 +1,166 @@
+"""
+Columnar purchase history for the Cookie Clicker simulator.
+
+ColumnarHistory stores the (time, item, cost, total cookies) entries
+of ClickerState in array buffers instead of a list of tuples, and can
+be exported to a flat binary file whose columns can be memory-mapped.
+
+Export layout (little-endian):
+    header      "CKH2", entry count, byte length of the name table
+    name table  item names joined by newlines, None stored as "",
+                then zero bytes up to the next multiple of 8 bytes
+                of the file, so every float64 column is aligned
+    time        count float64
+    cost        count float64
+    total       count float64
+    item        count uint16 indices into the name table
+"""
+
+from array import array
+import mmap
+import struct
+import sys
+
+MAGIC = "CKH2"
+HEADER = struct.Struct("<4sII")
+
+
+class ColumnarHistory:
+    """
+    Purchase history kept as parallel time, cost and total cookies
+    arrays plus an interned item ID column.  It behaves like the
+    list of tuples it replaces: len, indexing and iteration all
+    give (time, item, cost, total cookies) tuples.
+    """
+
+    def __init__(self):
+        self._times = array('d')
+        self._costs = array('d')
+        self._totals = array('d')
+        self._item_ids = array('H')
+        self._names = []
+        self._name_ids = {}
+
+    def _intern(self, item):
+        """
+        Return the ID of an item name, adding it if it is new.
+        """
+        item_id = self._name_ids.get(item)
+        if item_id is None:
+            item_id = len(self._names)
+            self._names.append(item)
+            self._name_ids[item] = item_id
+        return item_id
+
+    def append(self, entry):
+        """
+        Add a (time, item, cost, total cookies) entry.
+        """
+        time, item, cost, total = entry
+        self._times.append(time)
+        self._costs.append(cost)
+        self._totals.append(total)
+        self._item_ids.append(self._intern(item))
+
+    def __len__(self):
+        return len(self._times)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self)))]
+        return (self._times[index], self._names[self._item_ids[index]],
+                self._costs[index], self._totals[index])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def get_column(self, name):
+        """
+        Return one column: "time", "cost" and "total" are arrays,
+        "item" is a list of item names.
+        """
+        if name == "item":
+            return [self._names[item_id] for item_id in self._item_ids]
+        return {"time": self._times, "cost": self._costs,
+                "total": self._totals}[name]
+
+    def downsample(self, max_points):
+        """
+        Return at most max_points evenly spaced (time, total cookies)
+        pairs, always including the first and last entries, ready
+        for simpleplot.plot_lines.
+        """
+        count = len(self)
+        if count <= max_points:
+            indices = range(count)
+        elif max_points < 2:
+            indices = [count - 1]
+        else:
+            step = (count - 1) / float(max_points - 1)
+            indices = [int(round(point * step)) for point in range(max_points)]
+        return [(self._times[index], self._totals[index]) for index in indices]
+
+    def export(self, path):
+        """
+        Write the history to path in the export layout.
+        """
+        names = "\n".join(name or "" for name in self._names)
+        columns = [self._times, self._costs, self._totals, self._item_ids]
+        if sys.byteorder == "big":
+            columns = [array(column.typecode, column) for column in columns]
+            for column in columns:
+                column.byteswap()
+        with open(path, "wb") as output:
+            output.write(HEADER.pack(MAGIC, len(self), len(names)))
+            output.write(names)
+            output.write("\0" * _padding(len(names)))
+            for column in columns:
+                column.tofile(output)
+
+def _padding(names_length):
+    """
+    Return the number of zero bytes after a name table of
+    names_length bytes.
+    """
+    return -(HEADER.size + names_length) % 8
+
+def column_offsets(count, names_length):
+    """
+    Return the byte offsets of the time, cost, total and item
+    columns in an exported file, for use with numpy.memmap.  The
+    float64 columns start at multiples of 8.
+    """
+    start = HEADER.size + names_length + _padding(names_length)
+    return {"time": start,
+            "cost": start + 8 * count,
+            "total": start + 16 * count,
+            "item": start + 24 * count}
+
+def load_history(path):
+    """
+    Read an exported history back into a ColumnarHistory.
+    """
+    history = ColumnarHistory()
+    with open(path, "rb") as source:
+        data = mmap.mmap(source.fileno(), 0, access = mmap.ACCESS_READ)
+        try:
+            magic, count, names_length = HEADER.unpack_from(data, 0)
+            if magic != MAGIC:
+                raise ValueError("not a Cookie Clicker history file: " + path)
+            names = data[HEADER.size:HEADER.size + names_length]
+            history._names = [name or None for name in names.split("\n")]
+            history._name_ids = dict((name, item_id) for item_id, name
+                                     in enumerate(history._names))
+            offsets = column_offsets(count, names_length)
+            for name, column, width in (("time", history._times, 8),
+                                        ("cost", history._costs, 8),
+                                        ("total", history._totals, 8),
+                                        ("item", history._item_ids, 2)):
+                start = offsets[name]
+                column.fromstring(data[start:start + width * count])
+                if sys.byteorder == "big":
+                    column.byteswap()
+        finally:
+            data.close()
+    return history
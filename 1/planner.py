@@ -0,0 +1,208 @@
+"""
+Branch-and-bound purchase planner for the Cookie Clicker simulator.
+
+PlannerStrategy searches purchase orders a few items deep for the one
+that produces the most cookies over the time left, and can be passed
+to simulate_clicker like any other strategy.  Each searched order is
+scored by playing it and then a short greedy rollout, which keeps the
+search from favouring a long wait for one expensive item.
+"""
+
+import math
+import time
+
+
+class PlannerStrategy:
+    """
+    Strategy that plans up to horizon purchases ahead on every call
+    and returns the first item of the best plan found within
+    time_budget seconds (or None if buying nothing is best).
+    """
+
+    def __init__(self, horizon = 3, time_budget = 0.01, time_bucket = None,
+                 rollout = 20):
+        """
+        horizon: purchases searched exhaustively
+        time_budget: wall-clock seconds per call
+        time_bucket: width of the time buckets of the memo table,
+        by default 1/256 of the time left
+        rollout: greedy purchases appended to every searched plan
+        before it is scored
+        """
+        self._horizon = horizon
+        self._rollout = rollout
+        self._time_budget = time_budget
+        self._time_bucket = time_bucket
+        self._plan = []
+        self._nodes = 0
+
+        # Search state, set by plan
+        self._items = []
+        self._costs = []
+        self._cps = []
+        self._max_cps = 0.0
+        self._growth = 1.0
+        self._time_left = 0.0
+        self._bucket = 1.0
+        self._deadline = 0.0
+        self._memo = {}
+        self._best_value = 0.0
+        self._best_plan = []
+
+    def __call__(self, cookies, cps, time_left, build_info):
+        """
+        Strategy interface for simulate_clicker.
+        """
+        self._plan = self.plan(cookies, cps, time_left, build_info)
+        if self._plan:
+            return self._plan[0]
+        return None
+
+    def get_plan(self):
+        """
+        Return the plan found by the last call.
+        """
+        return list(self._plan)
+
+    def get_nodes(self):
+        """
+        Return the number of nodes searched by the last call.
+        """
+        return self._nodes
+
+    def plan(self, cookies, cps, time_left, build_info):
+        """
+        Return the list of items, at most horizon long, whose
+        purchase in order (followed by the greedy rollout) produces
+        the most cookies in time_left.
+        """
+        items = build_info.build_items()
+        self._items = items
+        self._costs = [build_info.get_cost(item) for item in items]
+        self._cps = [build_info.get_cps(item) for item in items]
+        self._max_cps = max(self._cps or [0.0])
+        self._growth = _growth_factor(build_info, items)
+        self._time_left = time_left
+        self._bucket = self._time_bucket or max(time_left / 256.0, 1.0)
+        self._deadline = time.time() + self._time_budget
+        self._memo = {}
+        self._nodes = 0
+        self._best_value = cps * time_left
+        self._best_plan = []
+        if items and time_left > 0:
+            self._search(0.0, cookies, cps, 0.0, list(self._costs),
+                         (0,) * len(items), [])
+        return [self._items[index] for index in self._best_plan]
+
+    def _rollout_value(self, now, cookies, cps, produced, costs):
+        """
+        Score a partial plan by extending it with up to rollout
+        greedy purchases, each time taking the item that pays for
+        itself soonest, and then waiting until the end.  The result
+        is the production of a plan that can really be played, so
+        it never overrates the partial plan.
+        """
+        costs = list(costs)
+        for dummy_step in range(self._rollout):
+            best_index = None
+            best_payback = float('inf')
+            for index in range(len(costs)):
+                wait = max(0.0, math.ceil((costs[index] - cookies) / cps))
+                if now + wait > self._time_left:
+                    continue
+                payback = wait + costs[index] / self._cps[index]
+                if payback < best_payback:
+                    best_payback = payback
+                    best_index = index
+                    best_wait = wait
+            if best_index is None or now + best_payback > self._time_left:
+                break
+            now += best_wait
+            produced += best_wait * cps
+            cookies += best_wait * cps - costs[best_index]
+            cps += self._cps[best_index]
+            costs[best_index] *= self._growth
+        return produced + cps * (self._time_left - now)
+
+    def _bound(self, now, cookies, cps, produced, costs, depth):
+        """
+        Upper bound on the score of any plan extending a partial
+        plan of depth purchases.
+
+        Scored plans have at most horizon purchases plus the
+        rollout, so CPS never exceeds cps plus that many times the
+        largest item CPS.  Below that cap CPS grows at most
+        exponentially: costs only grow, so no cookie buys more CPS
+        than the best CPS per cookie available now.
+        """
+        remaining = self._time_left - now
+        purchases = self._horizon - depth + self._rollout
+        cap = cps + purchases * self._max_cps
+        rate = max([self._cps[index] / costs[index]
+                    for index in range(len(costs))])
+        start = cps + rate * cookies
+        if start >= cap:
+            return produced + cap * remaining
+        # Time at which the exponential reaches the cap
+        reach = math.log(cap / start) / rate
+        if reach >= remaining:
+            return produced + start * (math.exp(rate * remaining) - 1.0) / rate
+        return produced + (cap - start) / rate + cap * (remaining - reach)
+
+    def _search(self, now, cookies, cps, produced, costs, counts, plan):
+        """
+        Depth-first branch and bound over purchase orders.
+        """
+        self._nodes += 1
+        if plan:
+            value = self._rollout_value(now, cookies, cps, produced, costs)
+            if value > self._best_value:
+                self._best_value = value
+                self._best_plan = list(plan)
+        if len(plan) >= self._horizon:
+            return
+        if (self._nodes & 0x3F == 0 and time.time() > self._deadline):
+            return
+        if (self._bound(now, cookies, cps, produced, costs, len(plan))
+                <= self._best_value):
+            return
+
+        # Same counts means same CPS, same costs and the same total
+        # spent, so an earlier state with at least as many cookies
+        # dominates this one.
+        key = (counts, int(now // self._bucket))
+        seen = self._memo.get(key)
+        if seen is not None and seen[0] <= now and seen[1] >= cookies:
+            return
+        self._memo[key] = (now, cookies)
+
+        children = []
+        for index in range(len(costs)):
+            wait = max(0.0, math.ceil((costs[index] - cookies) / cps))
+            if now + wait <= self._time_left:
+                children.append((wait + costs[index] / self._cps[index], wait, index))
+        children.sort()
+        for dummy_payback, wait, index in children:
+            cost = costs[index]
+            new_costs = list(costs)
+            new_costs[index] = cost * self._growth
+            new_counts = counts[:index] + (counts[index] + 1,) + counts[index + 1:]
+            plan.append(index)
+            self._search(now + wait, cookies + wait * cps - cost,
+                         cps + self._cps[index], produced + wait * cps,
+                         new_costs, new_counts, plan)
+            plan.pop()
+            if time.time() > self._deadline:
+                return
+
+def _growth_factor(build_info, items):
+    """
+    Recover the cost growth factor of a build info by updating an
+    item on a clone.
+    """
+    if not items:
+        return 1.0
+    probe = build_info.clone()
+    cost = probe.get_cost(items[0])
+    probe.update_item(items[0])
+    return probe.get_cost(items[0]) / cost
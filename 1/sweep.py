@@ -0,0 +1,125 @@
+"""
+Parallel strategy and parameter sweep for the Cookie Clicker simulator.
+
+Every combination of strategy, build table, growth factor and duration
+is one cell.  Cells run across a process pool and the results come
+back as a columnar table: a dictionary mapping each column name to the
+list of its values, one entry per cell.
+"""
+
+import csv
+import multiprocessing
+import sys
+
+from BuildInfo import BuildInfo, BUILD_GROWTH
+from CookieClicker import (SIM_TIME, simulate_clicker, strategy_cursor,
+                           strategy_cheap, strategy_expensive, strategy_best)
+
+STRATEGIES = {"Cursor": strategy_cursor,
+              "Cheap": strategy_cheap,
+              "Expensive": strategy_expensive,
+              "Best": strategy_best}
+
+COLUMNS = ["strategy", "build", "growth", "duration",
+           "total_cookies", "final_cps", "purchases"]
+PURCHASE_PREFIX = "purchases_"
+
+
+def run_cell(cell):
+    """
+    Run one simulation.
+
+    cell: (strategy name, strategy, build name, build table,
+    growth factor, duration).  A build table of None is the
+    default BuildInfo table.
+
+    Returns a dictionary with the result columns for the cell and
+    the number of purchases of each item.
+    """
+    strategy_name, strategy, build_name, table, growth, duration = cell
+    state = simulate_clicker(BuildInfo(table, growth), duration, strategy)
+    counts = {}
+    for entry in state.get_history()[1:]:
+        counts[entry[1]] = counts.get(entry[1], 0) + 1
+    return {"strategy": strategy_name,
+            "build": build_name,
+            "growth": growth,
+            "duration": duration,
+            "total_cookies": state.get_total_cookies(),
+            "final_cps": state.get_cps(),
+            "purchases": sum(counts.values()),
+            "counts": counts}
+
+def make_cells(strategies, build_tables, growth_factors, durations):
+    """
+    Return the list of cells for the cross product of the given
+    strategies ({name: strategy}), build tables ({name: table}),
+    growth factors and durations.
+    """
+    cells = []
+    for strategy_name in sorted(strategies):
+        for build_name in sorted(build_tables):
+            for growth in growth_factors:
+                for duration in durations:
+                    cells.append((strategy_name, strategies[strategy_name],
+                                  build_name, build_tables[build_name],
+                                  growth, duration))
+    return cells
+
+def run_sweep(strategies, build_tables, growth_factors, durations,
+              num_workers = None):
+    """
+    Run every cell of the sweep on a pool of num_workers processes
+    (all cores by default, 1 runs in this process).
+
+    Returns a columnar table.  Besides COLUMNS it has one
+    purchases_<item> column for every item of every build table.
+    """
+    cells = make_cells(strategies, build_tables, growth_factors, durations)
+    if num_workers is None:
+        num_workers = multiprocessing.cpu_count()
+    if num_workers <= 1:
+        rows = [run_cell(cell) for cell in cells]
+    else:
+        pool = multiprocessing.Pool(num_workers)
+        try:
+            rows = pool.map(run_cell, cells, max(1, len(cells) // (4 * num_workers)))
+        finally:
+            pool.close()
+            pool.join()
+
+    items = set()
+    for table in build_tables.values():
+        items.update(BuildInfo(table).build_items())
+    items = sorted(items)
+    result = dict((column, [row[column] for row in rows]) for column in COLUMNS)
+    for item in items:
+        result[PURCHASE_PREFIX + item] = [row["counts"].get(item, 0) for row in rows]
+    return result
+
+def column_names(table):
+    """
+    Return the column names of a sweep table in output order.
+    """
+    return COLUMNS + sorted(name for name in table if name not in COLUMNS)
+
+def write_csv(table, path):
+    """
+    Write a sweep table to path as CSV with a header row.
+    """
+    names = column_names(table)
+    with open(path, "wb") as output:
+        writer = csv.writer(output)
+        writer.writerow(names)
+        for row in zip(*[table[name] for name in names]):
+            writer.writerow([repr(value) if isinstance(value, float) else value
+                             for value in row])
+
+if __name__ == "__main__":
+    OUTPUT = "sweep.csv"
+    if len(sys.argv) > 1:
+        OUTPUT = sys.argv[1]
+    TABLE = run_sweep(STRATEGIES, {"default": None},
+                      [1.1, BUILD_GROWTH, 1.2], [1e8, SIM_TIME])
+    write_csv(TABLE, OUTPUT)
+    print "Wrote", len(TABLE["strategy"]), "runs to", OUTPUT
@@ -5,8 +5,8 @@
 Monte Carlo Tic-Tac-Toe Player
 """
 
+import math
 import random
-import poc_ttt_gui
 import poc_ttt_provided as provided
 
 # Constants for Monte Carlo simulator
@@ -14,6 +14,9 @@ import poc_ttt_provided as provided
 NTRIALS = 200    # Number of trials to run
 MCMATCH = 2.0  # Score for squares played by the machine player
 MCOTHER = 1.0  # Score for squares played by the other player
+ADAPTIVE_BATCH = 10       # Trials between checks in mc_move_adaptive
+ADAPTIVE_MIN_TRIALS = 30  # Trials before mc_move_adaptive drops any square
+ADAPTIVE_CONFIDENCE = 2.0 # Width of the confidence bounds in standard deviations
     
 # Add your functions here.
 
@@ -79,13 +82,60 @@ def mc_move(board, player, trials):
         mc_update_scores(scores, initial_board, player)    
     return get_best_move(board, scores)    
 
+def mc_move_adaptive(board, player, trials):
+    """
+    return the best move as (row,col) computed by MC method, using at
+    most trials trials.  Trials are played in batches and only start
+    from the squares still in the running: a square drops out once its
+    upper confidence bound falls below the best square's lower bound,
+    and the search stops when one square is left
+    """
+    dim = board.get_dim()
+    candidates = board.get_empty_squares()
+    if len(candidates) == 1:
+        return candidates[0]
+    sums = [[0.0 for dummycol in range(dim)] for dummyrow in range(dim)]
+    squares = [[0.0 for dummycol in range(dim)] for dummyrow in range(dim)]
+    count = 0
+    while count < trials and len(candidates) > 1:
+        for dummy_count in range(min(ADAPTIVE_BATCH, trials - count)):
+            first = candidates[random.randrange(len(candidates))]
+            trial_board = board.clone()
+            trial_board.move(first[0], first[1], player)
+            mc_trial(trial_board, provided.switch_player(player))
+            trial_scores = [[0 for dummycol in range(dim)] for dummyrow in range(dim)]
+            mc_update_scores(trial_scores, trial_board, player)
+            for (row, col) in candidates:
+                sums[row][col] += trial_scores[row][col]
+                squares[row][col] += trial_scores[row][col] ** 2
+            count += 1
+        if count < ADAPTIVE_MIN_TRIALS:
+            continue
+        bounds = {}
+        for (row, col) in candidates:
+            mean = sums[row][col] / count
+            variance = max(squares[row][col] / count - mean * mean, 0.0)
+            radius = ADAPTIVE_CONFIDENCE * math.sqrt(variance / count)
+            bounds[(row, col)] = (mean - radius, mean + radius)
+        best_lower = max(lower for (lower, dummy_upper) in bounds.values())
+        candidates = [square for square in candidates
+                      if bounds[square][1] >= best_lower]
+    scores = [[float("-inf") for dummycol in range(dim)] for dummyrow in range(dim)]
+    for (row, col) in candidates:
+        scores[row][col] = sums[row][col]
+    return get_best_move(board, scores)
+
     
 
 # Test game with the console or the GUI.
 # Uncomment whichever you prefer.
 # Both should be commented out when you submit for
-# testing to save time.
+# testing to save time.  The GUI needs simplegui, which only
+# CodeSkulptor has, so it is imported here rather than at the top
+# (mc_numpy and mc_parallel import this module under CPython).
 
 #provided.play_game(mc_move, NTRIALS, False)        
+#provided.play_game(mc_move_adaptive, NTRIALS, False)
+#import poc_ttt_gui
 #poc_ttt_gui.run_gui(3, provided.PLAYERO, mc_move, NTRIALS, False)
 #mc_update_scores([[0, 0, 0], [0, 0, 0], [0, 0, 0]], provided.TTTBoard(3, False, [[PLAYERX, PLAYERX, PLAYERO], [PLAYERO, PLAYERX, EMPTY], [EMPTY, PLAYERX, PLAYERO]]), 2)
@@ -0,0 +1,123 @@
+"""
+Multi-process Monte Carlo Tic-Tac-Toe player.
+
+mc_move_parallel splits the trials of a move into fixed-size chunks,
+plays the chunks on a worker pool that lives for the whole session and
+sums the partial score grids.  Every chunk is seeded from the board
+hash, the chunk index and the caller's seed, so a move is reproducible
+for a given seed whatever the number of workers.
+"""
+
+import atexit
+import multiprocessing
+import random
+
+import poc_ttt_provided as provided
+from TicTacToe import mc_trial, mc_update_scores
+
+CHUNK_TRIALS = 50  # Trials per chunk of work
+
+_POOL = None
+_POOL_SIZE = 0
+
+
+def get_pool(num_workers = None):
+    """
+    Return the persistent worker pool, starting it on first use
+    (or when a different number of workers is asked for).
+    """
+    global _POOL, _POOL_SIZE
+    if num_workers is None:
+        num_workers = multiprocessing.cpu_count()
+    if _POOL is None or _POOL_SIZE != num_workers:
+        close_pool()
+        _POOL = multiprocessing.Pool(num_workers)
+        _POOL_SIZE = num_workers
+    return _POOL
+
+def close_pool():
+    """
+    Shut down the worker pool, if any.
+    """
+    global _POOL, _POOL_SIZE
+    if _POOL is not None:
+        _POOL.close()
+        _POOL.join()
+        _POOL = None
+        _POOL_SIZE = 0
+
+atexit.register(close_pool)
+
+def board_hash(board, player):
+    """
+    Return a hash of the board and the player to move that is the
+    same in every process and every run.
+    """
+    value = board.get_dim()
+    for row in range(board.get_dim()):
+        for col in range(board.get_dim()):
+            value = (value * 31 + board.square(row, col)) & 0xFFFFFFFF
+    return (value * 31 + player) & 0xFFFFFFFF
+
+def mix_seed(*values):
+    """
+    Combine integers into one 32-bit seed that is the same in every
+    process and every run.
+    """
+    seed = 0
+    for value in values:
+        seed = (seed * 1000003 + value) & 0xFFFFFFFF
+    return seed
+
+def _run_chunk(task):
+    """
+    Play one chunk of trials and return its score grid.
+    """
+    dim, reverse, grid, player, ntrials, seed = task
+    random.seed(seed)
+    board = provided.TTTBoard(dim, reverse, grid)
+    scores = [[0 for dummycol in range(dim)] for dummyrow in range(dim)]
+    for dummy_count in range(ntrials):
+        trial_board = board.clone()
+        mc_trial(trial_board, player)
+        mc_update_scores(scores, trial_board, player)
+    return scores
+
+def mc_move_parallel(board, player, trials, seed = 0, num_workers = None):
+    """
+    Return the best move as (row, col) computed by the MC method,
+    with the trials spread across the worker pool.  num_workers = 1
+    plays every chunk in this process and gives the same result,
+    leaving the state of the global random module as it was.
+    """
+    dim = board.get_dim()
+    grid = [[board.square(row, col) for col in range(dim)] for row in range(dim)]
+    reverse = board.is_reverse()
+    hash_value = board_hash(board, player)
+    tasks = []
+    for index, start in enumerate(range(0, trials, CHUNK_TRIALS)):
+        tasks.append((dim, reverse, grid, player, min(CHUNK_TRIALS, trials - start),
+                      mix_seed(hash_value, index, seed)))
+    if num_workers == 1:
+        # Chunks reseed the global random module; keep the caller's state
+        state = random.getstate()
+        try:
+            partials = [_run_chunk(task) for task in tasks]
+        finally:
+            random.setstate(state)
+    else:
+        partials = get_pool(num_workers).map(_run_chunk, tasks)
+
+    scores = [[0 for dummycol in range(dim)] for dummyrow in range(dim)]
+    for partial in partials:
+        for row in range(dim):
+            for col in range(dim):
+                scores[row][col] += partial[row][col]
+
+    # break ties with the move's own seed so the answer is reproducible
+    empty_squares = board.get_empty_squares()
+    max_score = max(scores[row][col] for (row, col) in empty_squares)
+    best_moves = [(row, col) for (row, col) in empty_squares
+                  if scores[row][col] == max_score]
+    tie_break = random.Random(mix_seed(hash_value, len(tasks), seed))
+    return best_moves[tie_break.randrange(len(best_moves))]
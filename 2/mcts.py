@@ -0,0 +1,177 @@
+"""
+Monte Carlo Tree Search Tic-Tac-Toe player.
+
+MCTSPlayer grows a UCT search tree (selection, expansion, random
+rollout, backpropagation) and keeps it between calls.  On the next
+call it finds the moves played since the tree's root by comparing the
+boards and walks down to the matching node, so the statistics of the
+subtree that was actually reached carry over to the new search.
+"""
+
+import math
+import random
+
+import poc_ttt_provided as provided
+
+EXPLORATION = 1.0  # UCT exploration constant
+
+
+class _Node:
+    """
+    Search tree node.  wins and visits are counted for the player
+    who moved into the node.
+    """
+
+    def __init__(self, move, to_move, parent = None):
+        self.move = move
+        self.to_move = to_move
+        self.parent = parent
+        self.children = {}
+        self.untried = None
+        self.wins = 0.0
+        self.visits = 0
+
+    def select_child(self, exploration):
+        """
+        Return the child with the highest UCT value.
+        """
+        log_visits = math.log(self.visits)
+        best_value = float("-inf")
+        for child in self.children.values():
+            value = (child.wins / child.visits +
+                     exploration * math.sqrt(log_visits / child.visits))
+            if value > best_value:
+                best_value = value
+                best_child = child
+        return best_child
+
+
+class MCTSPlayer:
+    """
+    Callable with the mc_move signature (board, player, trials) that
+    runs trials MCTS iterations and returns the move as (row, col).
+    Keep one instance per game (or per session; a board that cannot
+    be reached from the stored tree simply starts a new one).
+    """
+
+    def __init__(self, exploration = EXPLORATION):
+        self._exploration = exploration
+        self._root = None
+        self._grid = None
+        self._reverse = False
+        self._reused = 0
+
+    def __call__(self, board, player, trials):
+        """
+        Return the best move for player as (row, col).
+        """
+        empty_squares = board.get_empty_squares()
+        if len(empty_squares) == 1:
+            return empty_squares[0]
+        root = self._reroot(board, player)
+        self._reused = root.visits
+        for dummy_count in range(trials):
+            self._iterate(root, board.clone())
+        if not root.children:
+            # A new root with no trials: one iteration picks a random
+            # move, as mc_move does with 0 trials
+            self._iterate(root, board.clone())
+        best = max(root.children.values(), key = lambda child: child.visits)
+        self._root = root
+        self._grid = _grid(board)
+        self._reverse = board.is_reverse()
+        return best.move
+
+    def get_reused(self):
+        """
+        Return the number of visits the root of the last search
+        carried over from earlier searches.
+        """
+        return self._reused
+
+    def reset(self):
+        """
+        Drop the stored tree.
+        """
+        self._root = None
+        self._grid = None
+
+    def _reroot(self, board, player):
+        """
+        Return the stored node that matches board with player to move,
+        or a new root if there is none.
+        """
+        node = self._root
+        if (node is None or len(self._grid) != board.get_dim() or
+                self._reverse != board.is_reverse()):
+            return _Node(None, player)
+        grid = _grid(board)
+        new_squares = []
+        for row in range(len(grid)):
+            for col in range(len(grid)):
+                if grid[row][col] != self._grid[row][col]:
+                    if self._grid[row][col] != provided.EMPTY:
+                        return _Node(None, player)
+                    new_squares.append((row, col))
+        while new_squares:
+            moves = [square for square in new_squares
+                     if grid[square[0]][square[1]] == node.to_move]
+            if len(moves) != 1 or moves[0] not in node.children:
+                return _Node(None, player)
+            node = node.children[moves[0]]
+            new_squares.remove(moves[0])
+        if node.to_move != player:
+            return _Node(None, player)
+        node.parent = None
+        return node
+
+    def _iterate(self, node, board):
+        """
+        Run one selection, expansion, rollout and backpropagation
+        step from node, whose position is board.  board is changed.
+        """
+        # Selection
+        while node.untried == [] and node.children:
+            node = node.select_child(self._exploration)
+            board.move(node.move[0], node.move[1], provided.switch_player(node.to_move))
+
+        # Expansion
+        if board.check_win() == None:
+            if node.untried is None:
+                node.untried = board.get_empty_squares()
+                random.shuffle(node.untried)
+            move = node.untried.pop()
+            board.move(move[0], move[1], node.to_move)
+            child = _Node(move, provided.switch_player(node.to_move), node)
+            node.children[move] = child
+            node = child
+
+        # Rollout
+        player = node.to_move
+        while board.check_win() == None:
+            empty_squares = board.get_empty_squares()
+            move = empty_squares[random.randrange(len(empty_squares))]
+            board.move(move[0], move[1], player)
+            player = provided.switch_player(player)
+
+        # Backpropagation
+        winner = board.check_win()
+        while node is not None:
+            node.visits += 1
+            if winner == provided.DRAW:
+                node.wins += 0.5
+            elif winner != node.to_move:
+                node.wins += 1.0
+            node = node.parent
+
+def _grid(board):
+    """
+    Return the squares of board as a list of lists.
+    """
+    dim = board.get_dim()
+    return [[board.square(row, col) for col in range(dim)] for row in range(dim)]
+
+# Player shared by play_game, which calls it for both sides.
+mcts_move = MCTSPlayer()
+
+#provided.play_game(mcts_move, 1000, False)
@@ -2,6 +2,8 @@
 Provided Code for Tic-Tac-Toe
 """
 
+import copy
+
 # Constants
 EMPTY = 1
 PLAYERX = 2
@@ -29,6 +31,22 @@ class TTTBoard:
             # Copy board grid
             self._board = [[board[row][col] for col in range(dim)] 
                            for row in range(dim)]
+
+        # Running counts of each player's marks in every line: rows
+        # are lines 0..dim-1, columns dim..2*dim-1, then the two
+        # diagonals.  _winner owns the first full line in that order.
+        self._line_counts = {PLAYERX: [0] * (2 * dim + 2),
+                             PLAYERO: [0] * (2 * dim + 2)}
+        self._num_empty = dim * dim
+        self._winner = None
+        for row in range(dim):
+            for col in range(dim):
+                if self._board[row][col] != EMPTY:
+                    self._num_empty -= 1
+                    counts = self._line_counts[self._board[row][col]]
+                    for line in self._lines_through(row, col):
+                        counts[line] += 1
+        self._winner = self._full_line_owner()
             
     def __str__(self):
         """
@@ -52,6 +70,13 @@ class TTTBoard:
         Return the dimension of the board.
         """
         return self._dim
+
+    def is_reverse(self):
+        """
+        Return True if the game is played in reverse (misere),
+        where completing a line loses.
+        """
+        return self._reverse
     
     def square(self, row, col):
         """
@@ -71,6 +96,27 @@ class TTTBoard:
                     empty.append((row, col))
         return empty
 
+    def _full_line_owner(self):
+        """
+        Return the owner of the first full line, or None.
+        """
+        for line in range(2 * self._dim + 2):
+            for player in (PLAYERX, PLAYERO):
+                if self._line_counts[player][line] == self._dim:
+                    return player
+        return None
+
+    def _lines_through(self, row, col):
+        """
+        Return the indices of the lines that contain (row, col).
+        """
+        lines = [row, self._dim + col]
+        if row == col:
+            lines.append(2 * self._dim)
+        if row + col == self._dim - 1:
+            lines.append(2 * self._dim + 1)
+        return lines
+
     def move(self, row, col, player):
         """
         Place player on the board at position (row, col).
@@ -79,50 +125,198 @@ class TTTBoard:
         """
         if self._board[row][col] == EMPTY:
             self._board[row][col] = player
+            self._num_empty -= 1
+            counts = self._line_counts[player]
+            full = False
+            for line in self._lines_through(row, col):
+                counts[line] += 1
+                if counts[line] == self._dim:
+                    full = True
+            if full:
+                if self._winner == None:
+                    self._winner = player
+                else:
+                    self._winner = self._full_line_owner()
 
     def check_win(self):
         """
         If someone has won, return player.
         If game is a draw, return DRAW.
         If game is in progress, return None.
-        """
-        lines = []
 
-        # rows
-        lines.extend(self._board)
-
-        # cols
-        cols = [[self._board[rowidx][colidx] for rowidx in range(self._dim)]
-                for colidx in range(self._dim)]
-        lines.extend(cols)
-
-        # diags
-        diag1 = [self._board[idx][idx] for idx in range(self._dim)]
-        diag2 = [self._board[idx][self._dim - idx -1] 
-                 for idx in range(self._dim)]
-        lines.append(diag1)
-        lines.append(diag2)
-
-        # check all lines
-        for line in lines:
-            if len(set(line)) == 1 and line[0] != EMPTY:
-                if self._reverse:
-                    return switch_player(line[0])
-                else:
-                    return line[0]
+        Uses the line counts kept up to date by move, so it
+        runs in constant time.
+        """
+        if self._winner != None:
+            if self._reverse:
+                return switch_player(self._winner)
+            else:
+                return self._winner
 
         # no winner, check for draw
-        if len(self.get_empty_squares()) == 0:
+        if self._num_empty == 0:
             return DRAW
 
         # game is still in progress
         return None
             
+    def clone(self):
+        """
+        Return a copy of the board.  The line counts, number of empty
+        squares and winner are copied rather than recounted.
+        """
+        board = copy.copy(self)
+        board._board = [row[:] for row in self._board]
+        board._line_counts = {PLAYERX: self._line_counts[PLAYERX][:],
+                              PLAYERO: self._line_counts[PLAYERO][:]}
+        return board
+
+# Win lines of BitTTTBoard for each dim: (masks of all lines in
+# row, column, diagonal order, masks of the lines through each square)
+_WIN_MASKS = {}
+
+def win_masks(dim):
+    """
+    Return the precomputed win line bitmasks for boards of size dim.
+    Square (row, col) is bit row * dim + col.
+    """
+    if dim not in _WIN_MASKS:
+        lines = []
+        for row in range(dim):
+            lines.append(sum([1 << (row * dim + col) for col in range(dim)]))
+        for col in range(dim):
+            lines.append(sum([1 << (row * dim + col) for row in range(dim)]))
+        lines.append(sum([1 << (idx * dim + idx) for idx in range(dim)]))
+        lines.append(sum([1 << (idx * dim + dim - 1 - idx) for idx in range(dim)]))
+        square_lines = [[mask for mask in lines if mask & (1 << square)]
+                        for square in range(dim * dim)]
+        _WIN_MASKS[dim] = (lines, square_lines)
+    return _WIN_MASKS[dim]
+
+class BitTTTBoard:
+    """
+    Class to represent a Tic-Tac-Toe board, with the same interface
+    as TTTBoard, that stores each player's marks as one integer
+    bitmask.  Cloning copies two integers and check_win compares the
+    precomputed win masks.
+    """
+
+    def __init__(self, dim, reverse = False, board = None):
+        self._dim = dim
+        self._reverse = reverse
+        self._lines, self._square_lines = win_masks(dim)
+        self._full = (1 << (dim * dim)) - 1
+        self._xbits = 0
+        self._obits = 0
+        self._winner = None
+        if board != None:
+            for row in range(dim):
+                for col in range(dim):
+                    if board[row][col] == PLAYERX:
+                        self._xbits |= 1 << (row * dim + col)
+                    elif board[row][col] == PLAYERO:
+                        self._obits |= 1 << (row * dim + col)
+            self._winner = self._full_line_owner()
+
+    def __str__(self):
+        """
+        Human readable representation of the board.
+        """
+        return TTTBoard(self._dim, self._reverse,
+                        [[self.square(row, col) for col in range(self._dim)]
+                         for row in range(self._dim)]).__str__()
+
+    def get_dim(self):
+        """
+        Return the dimension of the board.
+        """
+        return self._dim
+
+    def is_reverse(self):
+        """
+        Return True if the game is played in reverse (misere),
+        where completing a line loses.
+        """
+        return self._reverse
+
+    def square(self, row, col):
+        """
+        Return the status (EMPTY, PLAYERX, PLAYERO) of the square at
+        position (row, col).
+        """
+        bit = 1 << (row * self._dim + col)
+        if self._xbits & bit:
+            return PLAYERX
+        if self._obits & bit:
+            return PLAYERO
+        return EMPTY
+
+    def get_empty_squares(self):
+        """
+        Return a list of (row, col) tuples for all empty squares
+        """
+        taken = self._xbits | self._obits
+        empty = []
+        for square in range(self._dim * self._dim):
+            if not taken & (1 << square):
+                empty.append((square // self._dim, square % self._dim))
+        return empty
+
+    def _full_line_owner(self):
+        """
+        Return the owner of the first full line, or None.
+        """
+        for mask in self._lines:
+            if self._xbits & mask == mask:
+                return PLAYERX
+            if self._obits & mask == mask:
+                return PLAYERO
+        return None
+
+    def move(self, row, col, player):
+        """
+        Place player on the board at position (row, col).
+
+        Does nothing if board square is not empty.
+        """
+        square = row * self._dim + col
+        bit = 1 << square
+        if (self._xbits | self._obits) & bit:
+            return
+        if player == PLAYERX:
+            self._xbits |= bit
+            marks = self._xbits
+        else:
+            self._obits |= bit
+            marks = self._obits
+        for mask in self._square_lines[square]:
+            if marks & mask == mask:
+                if self._winner == None:
+                    self._winner = player
+                else:
+                    self._winner = self._full_line_owner()
+                break
+
+    def check_win(self):
+        """
+        If someone has won, return player.
+        If game is a draw, return DRAW.
+        If game is in progress, return None.
+        """
+        if self._winner != None:
+            if self._reverse:
+                return switch_player(self._winner)
+            else:
+                return self._winner
+        if self._xbits | self._obits == self._full:
+            return DRAW
+        return None
+
     def clone(self):
         """
         Return a copy of the board.
         """
-        return TTTBoard(self._dim, self._reverse, self._board)
+        return copy.copy(self)
 
 def switch_player(player):
     """
@@ -135,12 +329,14 @@ def switch_player(player):
     else:
         return PLAYERX
 
-def play_game(mc_move_function, ntrials, reverse = False):
+def play_game(mc_move_function, ntrials, reverse = False, board_class = TTTBoard):
     """
     Function to play a game with two MC players.
+
+    board_class can be BitTTTBoard to play on bitmask boards.
     """
     # Setup game
-    board = TTTBoard(3, reverse)
+    board = board_class(3, reverse)
     curplayer = PLAYERX
     winner = None
     
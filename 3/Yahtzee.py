@@ -3,6 +3,75 @@ Planner for Yahtzee
 Simplifications:  only allow discard and roll, only score against upper level
 """
 
+import collections
+import itertools
+import math
+
+
+class LRUCache:
+    """
+    Dictionary with a size cap that drops the least recently used
+    entry when full, and counts hits and misses.
+    """
+
+    def __init__(self, max_entries):
+        self._max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Return the value for key, or None.
+        """
+        value = self._entries.pop(key, None)
+        if value is None:
+            self._misses += 1
+            return None
+        self._entries[key] = value
+        self._hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Store value for key, dropping the least recently used entry
+        when the cache is full.
+        """
+        self._entries.pop(key, None)
+        self._entries[key] = value
+        if len(self._entries) > self._max_entries:
+            self._entries.popitem(last = False)
+
+    def get_stats(self):
+        """
+        Return (hits, misses, hit rate).
+        """
+        probes = self._hits + self._misses
+        if probes == 0:
+            return (0, 0, 0.0)
+        return (self._hits, self._misses, self._hits / float(probes))
+
+    def clear(self):
+        """
+        Remove all entries and reset the counters.
+        """
+        self._entries.clear()
+        self._hits = 0
+        self._misses = 0
+
+
+# Roll outcomes by (num_die_sides, num_free_dice)
+OUTCOME_CACHE = LRUCache(64)
+# Expected values by (sorted held dice, num_die_sides, num_free_dice)
+VALUE_CACHE = LRUCache(100000)
+# Precomputed strategy tables by (number of dice, num_die_sides),
+# see hold_table.py
+HOLD_TABLES = {}
+
+
 def gen_all_sequences(outcomes, length):
     """
     Iterative function that enumerates the set of all sequences of
@@ -21,6 +90,36 @@ def gen_all_sequences(outcomes, length):
     return answer_set
 
 
+def gen_all_multisets(outcomes, length):
+    """
+    Enumerate the sorted multisets of outcomes of given length, each
+    with the number of ordered sequences it stands for.
+
+    Returns a list of (sorted tuple, count) pairs
+    """
+    answer = []
+    sequences = math.factorial(length)
+    for multiset in itertools.combinations_with_replacement(sorted(outcomes), length):
+        count = sequences
+        for dummy_item, group in itertools.groupby(multiset):
+            count //= math.factorial(len(list(group)))
+        answer.append((multiset, count))
+    return answer
+
+
+def get_outcomes(num_die_sides, num_free_dice):
+    """
+    Return gen_all_multisets for num_free_dice dice with num_die_sides
+    sides, from OUTCOME_CACHE when possible.
+    """
+    key = (num_die_sides, num_free_dice)
+    outcomes = OUTCOME_CACHE.get(key)
+    if outcomes is None:
+        outcomes = gen_all_multisets(range(1, num_die_sides+1), num_free_dice)
+        OUTCOME_CACHE.put(key, outcomes)
+    return outcomes
+
+
 def score(hand):
     """
     Compute the maximal score for a Yahtzee hand according to the
@@ -30,12 +129,13 @@ def score(hand):
 
     Returns an integer score 
     """
+    totals = {}
+    for die in hand:
+        totals[die] = totals.get(die, 0) + die
     max_score = float('-inf')
-    dice = set(hand)
-    for die in dice:
-        tmp_socre = hand.count(die) * die
-        if tmp_socre > max_score:
-            max_score = tmp_socre          
+    for total in totals.values():
+        if total > max_score:
+            max_score = total
     return max_score
 
 
@@ -50,12 +150,16 @@ def expected_value(held_dice, num_die_sides, num_free_dice):
 
     Returns a floating point expected value
     """
-    all_rolls = gen_all_sequences(range(1, num_die_sides+1), num_free_dice)
-    value = 0.0
-    for roll in all_rolls:
-        hand = list(held_dice) + list(roll)
-        value += score(hand)        
-    return value / len(all_rolls)
+    held_dice = tuple(sorted(held_dice))
+    key = (held_dice, num_die_sides, num_free_dice)
+    expected = VALUE_CACHE.get(key)
+    if expected is None:
+        value = 0
+        for roll, count in get_outcomes(num_die_sides, num_free_dice):
+            value += count * score(held_dice + roll)
+        expected = float(value) / num_die_sides ** num_free_dice
+        VALUE_CACHE.put(key, expected)
+    return expected
 
 
 def gen_all_holds(hand):
@@ -83,7 +187,8 @@ def gen_all_holds(hand):
 def strategy(hand, num_die_sides):
     """
     Compute the hold that maximizes the expected value when the
-    discarded dice are rolled.
+    discarded dice are rolled.  Uses a hold table registered in
+    HOLD_TABLES for the number of dice and sides when there is one.
 
     hand: full yahtzee hand
     num_die_sides: number of sides on each die
@@ -91,6 +196,16 @@ def strategy(hand, num_die_sides):
     Returns a tuple where the first element is the expected score and
     the second element is a tuple of the dice to hold
     """
+    table = HOLD_TABLES.get((len(hand), num_die_sides))
+    if table is not None:
+        return table.lookup(hand)
+    return compute_strategy(hand, num_die_sides)
+
+
+def compute_strategy(hand, num_die_sides):
+    """
+    Compute the result of strategy by trying every hold.
+    """
     all_holds = gen_all_holds(hand)
     best_hold = ()
     max_score = float('-inf')
@@ -113,4 +228,6 @@ def run_example():
     print ("Best strategy for hand", hand, "is to hold", hold, "with expected score", hand_score)
     
     
-run_example()
+if __name__ == "__main__":
+    run_example()
+
@@ -0,0 +1,155 @@
+"""
+Precomputed hold decisions for every Yahtzee hand.
+
+build_table runs Yahtzee.compute_strategy on every sorted hand of a
+number of dice and sides and writes the answers to a binary table.
+load_table memory-maps a table and registers it with
+Yahtzee.strategy, which then answers with one lookup.
+
+Table layout (little-endian):
+    header   "YHT1", number of dice, number of sides
+    entries  one per sorted hand, in rank order: expected score as a
+             float64 and the dice to hold as a uint32 bitmask of
+             positions in the sorted hand
+"""
+
+import mmap
+import os
+import struct
+
+import Yahtzee
+
+MAGIC = "YHT1"
+HEADER = struct.Struct("<4sII")
+ENTRY = struct.Struct("<dI")
+
+TABLE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def table_path(num_dice, num_die_sides, directory = TABLE_DIRECTORY):
+    """
+    Return the default file name of a table.
+    """
+    return os.path.join(directory, "yahtzee_holds_%dd%d.bin" % (num_dice, num_die_sides))
+
+def binomial(total, choose):
+    """
+    Return the binomial coefficient total choose choose.
+    """
+    if choose < 0 or choose > total:
+        return 0
+    result = 1
+    for idx in range(choose):
+        result = result * (total - idx) // (idx + 1)
+    return result
+
+def num_hands(num_dice, num_die_sides):
+    """
+    Return the number of sorted hands of num_dice dice.
+    """
+    return binomial(num_die_sides + num_dice - 1, num_dice)
+
+def hand_rank(sorted_hand):
+    """
+    Return the index of a sorted hand among all sorted hands of its
+    length, counting in colexicographic order.
+    """
+    rank = 0
+    for idx in range(len(sorted_hand)):
+        rank += binomial(sorted_hand[idx] - 1 + idx, idx + 1)
+    return rank
+
+def gen_sorted_hands(num_dice, num_die_sides):
+    """
+    Return all sorted hands of num_dice dice in rank order.
+    """
+    hands = [()]
+    for dummy_idx in range(num_dice):
+        hands = [hand + (die,) for die in range(1, num_die_sides + 1)
+                 for hand in hands if not hand or hand[-1] <= die]
+    hands.sort(key = hand_rank)
+    return hands
+
+def build_table(num_dice, num_die_sides, path = None):
+    """
+    Evaluate every sorted hand and write the table to path,
+    table_path(num_dice, num_die_sides) by default.  Returns the
+    path.
+    """
+    if path is None:
+        path = table_path(num_dice, num_die_sides)
+    with open(path, "wb") as output:
+        output.write(HEADER.pack(MAGIC, num_dice, num_die_sides))
+        for hand in gen_sorted_hands(num_dice, num_die_sides):
+            expected, hold = Yahtzee.compute_strategy(hand, num_die_sides)
+            mask = 0
+            position = 0
+            for die in sorted(hold):
+                while hand[position] != die:
+                    position += 1
+                mask |= 1 << position
+                position += 1
+            output.write(ENTRY.pack(expected, mask))
+    return path
+
+class HoldTable:
+    """
+    Memory-mapped hold table.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as source:
+            self._data = mmap.mmap(source.fileno(), 0, access = mmap.ACCESS_READ)
+        magic, self._num_dice, self._num_die_sides = HEADER.unpack_from(self._data, 0)
+        if (magic != MAGIC or len(self._data) != HEADER.size +
+                ENTRY.size * num_hands(self._num_dice, self._num_die_sides)):
+            self._data.close()
+            raise ValueError("not a Yahtzee hold table: " + path)
+        self._faces = frozenset(range(1, self._num_die_sides + 1))
+
+    def get_key(self):
+        """
+        Return (number of dice, number of sides).
+        """
+        return (self._num_dice, self._num_die_sides)
+
+    def lookup(self, hand):
+        """
+        Return the (expected score, hold) of strategy for hand, with
+        the held dice in the order they appear in hand.  Hands that
+        are not in the table, because of their length or a die that
+        is not a face of the die, go to Yahtzee.compute_strategy.
+        """
+        if len(hand) != self._num_dice or not self._faces.issuperset(hand):
+            return Yahtzee.compute_strategy(hand, self._num_die_sides)
+        sorted_hand = tuple(sorted(int(die) for die in hand))
+        expected, mask = ENTRY.unpack_from(self._data, HEADER.size +
+                                           ENTRY.size * hand_rank(sorted_hand))
+        held = {}
+        for position in range(len(sorted_hand)):
+            if mask >> position & 1:
+                held[sorted_hand[position]] = held.get(sorted_hand[position], 0) + 1
+        hold = []
+        for die in hand:
+            if held.get(die, 0) > 0:
+                hold.append(die)
+                held[die] -= 1
+        return (expected, tuple(hold))
+
+    def close(self):
+        """
+        Unmap the table.
+        """
+        self._data.close()
+
+def load_table(path):
+    """
+    Map the table at path and register it with Yahtzee.strategy.
+    Returns the HoldTable.
+    """
+    table = HoldTable(path)
+    Yahtzee.HOLD_TABLES[table.get_key()] = table
+    return table
+
+if __name__ == "__main__":
+    print "Wrote", build_table(5, 6)
@@ -0,0 +1,163 @@
+"""
+Multi-roll turn optimizer for Yahtzee.
+
+TurnSolver plans a whole turn: roll all dice, then up to
+num_rolls - 1 times hold some dice and roll the rest, then score
+against the upper section as Yahtzee.score does.  It solves, by
+dynamic programming over (rolls left, sorted hand), the hold that
+maximizes the expected final score.
+
+States are sorted hands, numbered in hold_table.hand_rank order
+through a dictionary built once per solver.  The outcome distribution
+of every hold (every sorted sub-hand) is computed once as a list of
+(hand index, probability) pairs and shared by all the hands that
+contain it.
+"""
+
+import Yahtzee
+from hold_table import gen_sorted_hands
+
+
+class TurnSolver:
+    """
+    Expected values and best holds for every sorted hand of num_dice
+    dice with num_die_sides sides and every number of rolls left.
+    """
+
+    def __init__(self, num_dice = 5, num_die_sides = 6, num_rolls = 3):
+        self._num_dice = num_dice
+        self._num_die_sides = num_die_sides
+        self._num_rolls = num_rolls
+        self._hands = gen_sorted_hands(num_dice, num_die_sides)
+        self._hand_index = dict((hand, index) for index, hand in enumerate(self._hands))
+
+        # Holds, largest first so that ties keep more dice
+        self._holds = []
+        for size in range(num_dice, -1, -1):
+            self._holds.extend(gen_sorted_hands(size, num_die_sides))
+        self._hold_ids = dict((hold, hold_id) for hold_id, hold in enumerate(self._holds))
+        self._hand_holds = [sorted(self._hold_ids[hold] for hold in Yahtzee.gen_all_holds(hand))
+                            for hand in self._hands]
+        self._transitions = [self._transition(hold) for hold in self._holds]
+        self._values = None
+        self._choices = None
+
+    def _transition(self, hold):
+        """
+        Return the (hand indices, probabilities) of the hands reached
+        by holding hold and rolling the other dice.
+        """
+        num_free_dice = self._num_dice - len(hold)
+        rolls = float(self._num_die_sides ** num_free_dice)
+        indices = []
+        probabilities = []
+        for roll, count in Yahtzee.get_outcomes(self._num_die_sides, num_free_dice):
+            indices.append(self._hand_index[tuple(sorted(hold + roll))])
+            probabilities.append(count / rolls)
+        return (indices, probabilities)
+
+    def solve(self):
+        """
+        Fill the value and choice tables, one roll at a time.
+        """
+        values = [[Yahtzee.score(hand) for hand in self._hands]]
+        choices = [[self._hold_ids[hand] for hand in self._hands]]
+        for dummy_roll in range(1, self._num_rolls):
+            previous = values[-1]
+            hold_values = []
+            for indices, probabilities in self._transitions:
+                total = 0.0
+                for index, probability in zip(indices, probabilities):
+                    total += probability * previous[index]
+                hold_values.append(total)
+            roll_values = []
+            roll_choices = []
+            for hold_ids in self._hand_holds:
+                best_id = hold_ids[0]
+                for hold_id in hold_ids:
+                    if hold_values[hold_id] > hold_values[best_id]:
+                        best_id = hold_id
+                roll_values.append(hold_values[best_id])
+                roll_choices.append(best_id)
+            values.append(roll_values)
+            choices.append(roll_choices)
+        self._values = values
+        self._choices = choices
+
+    def solve_vectorized(self):
+        """
+        Same as solve, with each roll computed by NumPy array
+        operations over all holds and hands at once.
+        """
+        import numpy as np
+
+        hold_index = []
+        hand_index = []
+        probability = []
+        for hold_id, (indices, probabilities) in enumerate(self._transitions):
+            hold_index.extend([hold_id] * len(indices))
+            hand_index.extend(indices)
+            probability.extend(probabilities)
+        hold_index = np.array(hold_index)
+        hand_index = np.array(hand_index)
+        probability = np.array(probability)
+
+        # Holds of each hand, padded with a hold whose value is -inf
+        num_holds = len(self._holds)
+        width = max(len(hold_ids) for hold_ids in self._hand_holds)
+        hand_holds = np.empty((len(self._hands), width), dtype = int)
+        hand_holds.fill(num_holds)
+        for index, hold_ids in enumerate(self._hand_holds):
+            hand_holds[index, :len(hold_ids)] = hold_ids
+
+        values = [np.array([Yahtzee.score(hand) for hand in self._hands], dtype = float)]
+        choices = [np.array([self._hold_ids[hand] for hand in self._hands])]
+        for dummy_roll in range(1, self._num_rolls):
+            hold_values = np.bincount(hold_index, probability * values[-1][hand_index],
+                                      minlength = num_holds)
+            hold_values = np.append(hold_values, -np.inf)[hand_holds]
+            best = hold_values.argmax(axis = 1)
+            values.append(hold_values[np.arange(len(self._hands)), best])
+            choices.append(hand_holds[np.arange(len(self._hands)), best])
+        self._values = [list(roll_values) for roll_values in values]
+        self._choices = [list(roll_choices) for roll_choices in choices]
+
+    def get_value(self, hand, rolls_left):
+        """
+        Return the expected final score of hand with rolls_left
+        rolls still to come.
+        """
+        if self._values is None:
+            self.solve()
+        return self._values[rolls_left][self._hand_index[tuple(sorted(hand))]]
+
+    def best_hold(self, hand, rolls_left):
+        """
+        Return (expected score, dice to hold) for hand with rolls_left
+        rolls still to come; holding every die means stop rolling.
+        """
+        if self._values is None:
+            self.solve()
+        index = self._hand_index[tuple(sorted(hand))]
+        return (self._values[rolls_left][index],
+                self._holds[self._choices[rolls_left][index]])
+
+    def turn_value(self):
+        """
+        Return the expected score of a whole turn.
+        """
+        if self._values is None:
+            self.solve()
+        indices, probabilities = self._transitions[self._hold_ids[()]]
+        final = self._values[self._num_rolls - 1]
+        total = 0.0
+        for index, probability in zip(indices, probabilities):
+            total += probability * final[index]
+        return total
+
+
+if __name__ == "__main__":
+    SOLVER = TurnSolver()
+    print "Expected score of a turn:", SOLVER.turn_value()
+    for HAND in [(1, 1, 1, 5, 6), (2, 3, 3, 4, 6)]:
+        print "Best hold for", HAND, "with two rolls left:", SOLVER.best_hold(HAND, 2)
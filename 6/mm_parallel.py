@@ -0,0 +1,159 @@
+"""
+Parallel root-split minimax for Tic-Tac-Toe.
+
+mm_move_parallel searches the subtree under every root move as a
+separate task on a worker pool.  The best root value found so far is
+kept in a shared multiprocessing.Value that every worker reads while
+it searches, so subtrees still running prune against bounds found by
+subtrees that have finished.
+
+Workers prune only moves that are worse than the shared bound by more
+than EPSILON, so every move that ties the best value gets an exact
+value, and the first of them in root order is returned.  The answer
+is therefore the same for any number of workers.
+"""
+
+import atexit
+import multiprocessing
+
+import poc_ttt_provided as provided
+from mm_ttt import SCORES, AlphaBeta, TranspositionTable, _square_lines
+
+EPSILON = 1e-6  # Smaller than the gap between two distinct values
+
+_POOL = None
+_POOL_SIZE = 0
+_BOUND = None
+
+# Shared bound of the worker process, set by _init_worker
+_WORKER_BOUND = None
+
+
+def _init_worker(bound):
+    """
+    Pool initializer: remember the shared bound.
+    """
+    global _WORKER_BOUND
+    _WORKER_BOUND = bound
+
+def get_pool(num_workers = None):
+    """
+    Return the persistent worker pool, starting it on first use
+    (or when a different number of workers is asked for).  The
+    shared bound of the pool's workers is _BOUND.
+    """
+    global _POOL, _POOL_SIZE, _BOUND
+    if num_workers is None:
+        num_workers = multiprocessing.cpu_count()
+    if _POOL is None or _POOL_SIZE != num_workers:
+        close_pool()
+        _BOUND = multiprocessing.Value('d', -2.0)
+        _POOL = multiprocessing.Pool(num_workers, _init_worker, (_BOUND,))
+        _POOL_SIZE = num_workers
+    return _POOL
+
+def close_pool():
+    """
+    Shut down the worker pool, if any.
+    """
+    global _POOL, _POOL_SIZE, _BOUND
+    if _POOL is not None:
+        _POOL.close()
+        _POOL.join()
+        _POOL = None
+        _POOL_SIZE = 0
+        _BOUND = None
+
+atexit.register(close_pool)
+
+class _SharedBoundSearch(AlphaBeta):
+    """
+    Search of one root subtree whose window is narrowed by the shared
+    root bound as other subtrees finish.
+    """
+
+    def __init__(self, board, player, root_player, bound):
+        AlphaBeta.__init__(self, board, player, TranspositionTable())
+        self._root_player = root_player
+        self._bound = bound.get_obj()
+
+    def _window(self, player, alpha, beta):
+        """
+        Narrow the window to values that can still reach the shared
+        root bound.
+        """
+        limit = self._bound.value - EPSILON
+        if player == self._root_player:
+            return (max(alpha, limit), beta)
+        return (alpha, min(beta, -limit))
+
+def root_order(board):
+    """
+    Return the empty squares of board in root order: squares on the
+    most lines first, then by position.
+    """
+    dim = board.get_dim()
+    lines = _square_lines(dim)
+    squares = [row * dim + col for (row, col) in board.get_empty_squares()]
+    squares.sort(key = lambda square: -len(lines[square]))
+    return squares
+
+def _search_root_move(task):
+    """
+    Return (index, value, exact) for one root move: value is for the
+    root player, and exact is False when it is only an upper bound
+    below the shared bound.
+    """
+    index, dim, reverse, grid, player, square, depth = task
+    board = provided.TTTBoard(dim, reverse, grid)
+    board.move(square // dim, square % dim, player)
+    result = board.check_win()
+    if result != None:
+        value = SCORES[result] * SCORES[player]
+    else:
+        search = _SharedBoundSearch(board, provided.switch_player(player),
+                                    player, _WORKER_BOUND)
+        value = -search.search_window(depth - 1, -2, 2)[0]
+    with _WORKER_BOUND.get_lock():
+        exact = value > _WORKER_BOUND.value - EPSILON
+        if exact and value > _WORKER_BOUND.value:
+            _WORKER_BOUND.value = value
+    return (index, value, exact)
+
+def mm_move_parallel(board, player, max_depth = None, num_workers = None):
+    """
+    Make a move on the board with the root moves searched in
+    parallel.
+
+    Returns the same (score, move) tuple as mm_move.  With max_depth
+    the score can be a heuristic value between -1 and 1, as in
+    mm_ttt.mm_move_alphabeta.  num_workers = 1 searches in this
+    process and gives the same result.
+    """
+    result = board.check_win()
+    if result != None:
+        return (SCORES[result], (-1, -1))
+    dim = board.get_dim()
+    grid = [[board.square(row, col) for col in range(dim)] for row in range(dim)]
+    reverse = board.is_reverse()
+    squares = root_order(board)
+    if max_depth is None or max_depth > len(squares):
+        max_depth = len(squares)
+    tasks = [(index, dim, reverse, grid, player, squares[index], max_depth)
+             for index in range(len(squares))]
+
+    if num_workers == 1:
+        _init_worker(multiprocessing.Value('d', -2.0))
+        results = [_search_root_move(task) for task in tasks]
+    else:
+        pool = get_pool(num_workers)
+        _BOUND.value = -2.0
+        results = list(pool.imap_unordered(_search_root_move, tasks))
+
+    # Bounds are below the best exact value, so the first exact
+    # value that ties the best is the answer
+    best_value = max(value for (dummy_index, value, exact) in results if exact)
+    best_index = min(index for (index, value, exact) in results
+                     if exact and value == best_value)
+    square = squares[best_index]
+    return (best_value * SCORES[player], (square // dim, square % dim))
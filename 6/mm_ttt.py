@@ -2,8 +2,10 @@
 Mini-max Tic-Tac-Toe Player
 """
 
-import poc_ttt_provided as provided
+import collections
+import time
 
+import poc_ttt_provided as provided
 
 
 # SCORING VALUES - DO NOT MODIFY
@@ -11,6 +13,8 @@ SCORES = {provided.PLAYERX: 1,
           provided.DRAW: 0,
           provided.PLAYERO: -1}
 
+TIME_LIMIT = 1.0  # Seconds per move for move_wrapper
+
 def mm_move(board, player):
     """
     Make a move on the board.
@@ -37,12 +41,407 @@ def mm_move(board, player):
     for move in all_moves:
         if move[0]*SCORES[player] == max_score:
             return move
+
+class _Timeout(Exception):
+    """
+    Raised inside the search when the time limit has passed.
+    """
+    pass
+
+class LRUCache:
+    """
+    Dictionary with a size cap that drops the least recently used
+    entry when full, and counts hits and misses.
+    """
+
+    def __init__(self, max_entries):
+        self._max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Return the value for key, or None.
+        """
+        value = self._entries.pop(key, None)
+        if value is None:
+            self._misses += 1
+            return None
+        self._entries[key] = value
+        self._hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Store value for key, dropping the least recently used entry
+        when the cache is full.
+        """
+        self._entries.pop(key, None)
+        self._entries[key] = value
+        if len(self._entries) > self._max_entries:
+            self._entries.popitem(last = False)
+
+    def get_stats(self):
+        """
+        Return (hits, misses, hit rate).
+        """
+        probes = self._hits + self._misses
+        if probes == 0:
+            return (0, 0, 0.0)
+        return (self._hits, self._misses, self._hits / float(probes))
+
+    def clear(self):
+        """
+        Remove all entries and reset the counters.
+        """
+        self._entries.clear()
+        self._hits = 0
+        self._misses = 0
+
+# Transposition table entry flags
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+class TranspositionTable(LRUCache):
+    """
+    Least recently used table of searched positions with a size cap.
+
+    Keys come from canonical_key, so the 8 rotations and reflections
+    of a position share one entry.  Entries are (depth, value, flag,
+    move) tuples: the value was searched depth plies deep and is
+    EXACT, a LOWER bound or an UPPER bound; move is the best square
+    in canonical numbering, or None.
+    """
+
+    def __init__(self, max_entries = 100000):
+        LRUCache.__init__(self, max_entries)
+
+class AlphaBeta:
+    """
+    Negamax alpha-beta search over a flat copy of a board.
+
+    Moves are made and undone in place instead of cloning the board.
+    They are tried in the order: best move from the transposition
+    table or the previous iteration, killer moves of the ply, history
+    score, and squares on the most lines (center, then corners) first.
+    Values are from the point of view of the player to move: 1 for a
+    win, -1 for a loss, 0 for a draw, and a heuristic value strictly
+    between -1 and 1 at the depth limit.
+    """
+
+    def __init__(self, board, player, table = None):
+        self._dim = board.get_dim()
+        self._reverse = board.is_reverse()
+        self._player = player
+        self._table = table
+        self._cells = [board.square(square // self._dim, square % self._dim)
+                       for square in range(self._dim * self._dim)]
+        self._empty_count = self._cells.count(provided.EMPTY)
+        self._lines = _square_lines(self._dim)
+        self._all_lines = _all_lines(self._dim)
+        # In misere play completing a line loses
+        if self._reverse:
+            self._win_value = -1
+        else:
+            self._win_value = 1
+        self._deadline = None
+        self._killers = []
+        self._history = [0] * len(self._cells)
+        self._root_move = None
+        self._complete = True
+        self._nodes = 0
+
+    def get_nodes(self):
+        """
+        Return the number of nodes searched so far.
+        """
+        return self._nodes
+
+    def search(self, max_depth = None, time_limit = None):
+        """
+        Search by iterative deepening until the game is solved,
+        max_depth plies have been searched or time_limit seconds
+        have passed.  Returns (value, square) for the deepest
+        completed iteration.
+        """
+        empty_count = self._empty_count
+        if max_depth is None or max_depth > empty_count:
+            max_depth = empty_count
+        if time_limit is not None:
+            self._deadline = time.time() + time_limit
+        self._killers = [[] for dummy_ply in range(empty_count)]
+        result = None
+        for depth in range(1, max_depth + 1):
+            self._complete = True
+            try:
+                result = self._search(self._player, depth, 0, -2, 2)
+            except _Timeout:
+                break
+            self._root_move = result[1]
+            if self._complete or abs(result[0]) == 1:
+                break
+        if result is None:
+            # Not even one ply in time, play the first ordered move
+            result = (0, self._ordered(0, None)[0])
+        return result
+
+    def search_window(self, depth, alpha, beta):
+        """
+        Search depth plies with the window (alpha, beta) and no
+        iterative deepening.  Returns (value, square), with value
+        fail-soft: at most alpha means the value is at most that,
+        at least beta means it is at least that.
+        """
+        self._killers = [[] for dummy_ply in range(self._empty_count)]
+        self._complete = True
+        return self._search(self._player, depth, 0, alpha, beta)
+
+    def _window(self, player, alpha, beta):
+        """
+        Return the (alpha, beta) window to use at a node with player
+        to move.  Subclasses can narrow it while the search runs.
+        """
+        return (alpha, beta)
+
+    def _child(self, square, player, depth, ply, alpha, beta):
+        """
+        Play square for player and return the value of the resulting
+        position for the other player.
+        """
+        cells = self._cells
+        cells[square] = player
+        self._empty_count -= 1
+        try:
+            for line in self._lines[square]:
+                if all(cells[other] == player for other in line):
+                    return -self._win_value
+            if self._empty_count == 0:
+                return 0
+            return self._search(provided.switch_player(player), depth - 1, ply,
+                                alpha, beta)[0]
+        finally:
+            cells[square] = provided.EMPTY
+            self._empty_count += 1
+
+    def _search(self, player, depth, ply, alpha, beta):
+        """
+        Fail-soft alpha-beta search of a position that is not over.
+        Returns (value, best square); the square is None at the
+        depth limit.
+        """
+        self._nodes += 1
+        if self._deadline is not None and time.time() > self._deadline:
+            raise _Timeout
+        first = None
+        if ply == 0:
+            first = self._root_move
+        alpha, beta = self._window(player, alpha, beta)
+        if self._table is not None:
+            key, symmetry, inverse = canonical_key(self._cells, self._dim,
+                                                   self._reverse, player)
+            entry = self._table.get(key)
+            if entry is not None:
+                entry_depth, value, flag, move = entry
+                if move is not None:
+                    first = symmetry[move]
+                if entry_depth >= depth and (flag == EXACT or
+                                             (flag == LOWER and value >= beta) or
+                                             (flag == UPPER and value <= alpha)):
+                    # Entries searched to the end of the game are exact
+                    # at any depth
+                    if entry_depth < self._empty_count:
+                        self._complete = False
+                    return (value, first)
+        if depth == 0:
+            self._complete = False
+            return (self._evaluate(player), None)
+
+        outer_complete = self._complete
+        self._complete = True
+        alpha_start = alpha
+        best_value = -2
+        best_square = None
+        for square in self._ordered(ply, first):
+            value = -self._child(square, player, depth, ply + 1, -beta, -alpha)
+            if value > best_value:
+                best_value = value
+                best_square = square
+            alpha_start, beta = self._window(player, alpha_start, beta)
+            alpha = max(alpha, alpha_start, best_value)
+            if alpha >= beta:
+                killers = self._killers[ply]
+                if square not in killers:
+                    killers.insert(0, square)
+                    del killers[2:]
+                self._history[square] += depth * depth
+                break
+
+        if self._table is not None:
+            if best_value <= alpha_start:
+                flag = UPPER
+            elif best_value >= beta:
+                flag = LOWER
+            else:
+                flag = EXACT
+            if self._complete:
+                entry_depth = self._empty_count
+            else:
+                entry_depth = depth
+            self._table.put(key, (entry_depth, best_value, flag, inverse[best_square]))
+        self._complete = self._complete and outer_complete
+        return (best_value, best_square)
+
+    def _ordered(self, ply, first):
+        """
+        Return the empty squares in search order, first (if any)
+        leading.
+        """
+        killers = self._killers[ply] if ply < len(self._killers) else []
+        squares = [square for square in range(len(self._cells))
+                   if self._cells[square] == provided.EMPTY]
+        squares.sort(key = lambda square: (square == first,
+                                           square in killers,
+                                           self._history[square],
+                                           len(self._lines[square])),
+                     reverse = True)
+        return squares
+
+    def _evaluate(self, player):
+        """
+        Heuristic value for player of a position at the depth limit:
+        lines held only by one player count the square of their
+        marks, scaled into (-1, 1).  The sign is flipped in misere
+        play, where owning lines is bad.
+        """
+        cells = self._cells
+        other = provided.switch_player(player)
+        total = 0
+        for line in self._all_lines:
+            mine = 0
+            theirs = 0
+            for square in line:
+                if cells[square] == player:
+                    mine += 1
+                elif cells[square] == other:
+                    theirs += 1
+            if theirs == 0:
+                total += mine * mine
+            elif mine == 0:
+                total -= theirs * theirs
+        scale = float(len(self._all_lines) * self._dim * self._dim + 1)
+        return self._win_value * total / scale
+
+_LINES = {}
+
+def _all_lines(dim):
+    """
+    Return the rows, columns and diagonals of a dim x dim board as
+    lists of flat square indices.
+    """
+    if dim not in _LINES:
+        lines = [[row * dim + col for col in range(dim)] for row in range(dim)]
+        lines += [[row * dim + col for row in range(dim)] for col in range(dim)]
+        lines.append([idx * dim + idx for idx in range(dim)])
+        lines.append([idx * dim + dim - 1 - idx for idx in range(dim)])
+        square_lines = [[[other for other in line if other != square]
+                         for line in lines if square in line]
+                        for square in range(dim * dim)]
+        _LINES[dim] = (lines, square_lines)
+    return _LINES[dim][0]
+
+_SYMMETRIES = {}
+
+def _symmetries(dim):
+    """
+    Return the 8 rotations and reflections of a dim x dim board as
+    (symmetry, inverse) pairs of square lists: the transformed board
+    has cells[symmetry[square]] at square.
+    """
+    if dim not in _SYMMETRIES:
+        pairs = []
+        for turns in range(4):
+            for mirror in (False, True):
+                symmetry = []
+                for row in range(dim):
+                    for col in range(dim):
+                        src_row, src_col = row, col
+                        if mirror:
+                            src_col = dim - 1 - src_col
+                        for dummy_turn in range(turns):
+                            src_row, src_col = src_col, dim - 1 - src_row
+                        symmetry.append(src_row * dim + src_col)
+                inverse = [0] * len(symmetry)
+                for square in range(len(symmetry)):
+                    inverse[symmetry[square]] = square
+                pairs.append((symmetry, inverse))
+        _SYMMETRIES[dim] = pairs
+    return _SYMMETRIES[dim]
+
+def canonical_key(cells, dim, reverse, player):
+    """
+    Return (key, symmetry, inverse) for a flat board with player to
+    move.  key is the same for all 8 rotations and reflections of the
+    board; symmetry maps a square of the canonical board to cells and
+    inverse maps back.
+    """
+    best = None
+    for symmetry, inverse in _symmetries(dim):
+        cells_key = tuple([cells[square] for square in symmetry])
+        if best is None or cells_key < best[0]:
+            best = (cells_key, symmetry, inverse)
+    return ((dim, reverse, player, best[0]), best[1], best[2])
+
+def _square_lines(dim):
+    """
+    Return, for every square, the other squares of each line
+    through it.
+    """
+    _all_lines(dim)
+    return _LINES[dim][1]
+
+# Table shared by all mm_move_alphabeta calls
+TRANSPOSITION_TABLE = TranspositionTable()
+
+def mm_move_alphabeta(board, player, max_depth = None, time_limit = None,
+                      table = TRANSPOSITION_TABLE):
+    """
+    Make a move on the board with alpha-beta search.
+
+    Returns the same (score, move) tuple as mm_move.  Without limits
+    the score is exact; when max_depth plies or time_limit seconds
+    stop the search first, it can be a heuristic value between -1
+    and 1.  Searched positions are kept in table between calls
+    (None searches without a table).
+    """
+    result = board.check_win()
+    if result != None:
+        return (SCORES[result], (-1, -1))
+    value, square = AlphaBeta(board, player, table).search(max_depth, time_limit)
+    dim = board.get_dim()
+    return (value * SCORES[player], (square // dim, square % dim))
+
 def move_wrapper(board, player, trials):
     """
     Wrapper to allow the use of the same infrastructure that was used
     for Monte Carlo Tic-Tac-Toe.
+
+    Positions in a built ttt_book table are looked up instead of
+    searched.
     """
-    move = mm_move(board, player)
+    # ttt_book imports this module, so it is imported here
+    import ttt_book
+
+    move = None
+    book = ttt_book.get_book(board.get_dim(), board.is_reverse())
+    if book is not None:
+        move = book.lookup(board, player)
+    if move is None:
+        move = mm_move_alphabeta(board, player, time_limit = TIME_LIMIT)
     assert move[1] != (-1, -1), "returned illegal move (-1, -1)"
     return move[1]
 
@@ -51,7 +450,8 @@ def move_wrapper(board, player, trials):
 # Both should be commented out when you submit for
 # testing to save time.
 
-provided.play_game(move_wrapper, 1, False) 
+if __name__ == "__main__":
+    provided.play_game(move_wrapper, 1, False)
 #print (SCORES[4])
 #b = [[2,3,2],[3,2,1],[3,1,1]]
 #board = provided.TTTBoard(3,board = b)
@@ -0,0 +1,148 @@
+"""
+Precomputed solution tables for small Tic-Tac-Toe boards.
+
+build_book solves every position reachable from the empty board for
+one dim and reverse setting and writes one byte per position, indexed
+by the base 3 number whose digit for square row * dim + col is 0 for
+empty, 1 for X and 2 for O.  X always moves first, so the player to
+move follows from the position.
+
+File layout:
+    header   "TTB1", dim, reverse flag
+    entries  3 ** (dim * dim) bytes: best move << 2 | (score + 1),
+             with score 1, 0 or -1 as in mm_ttt.SCORES, or UNSOLVED
+             for finished and unreachable positions
+
+Positions are solved with mm_ttt's alpha-beta search, sharing one
+transposition table.  Run this module to build the 3x3 tables for
+normal and misere play.
+"""
+
+import mmap
+import os
+import struct
+
+import poc_ttt_provided as provided
+from mm_ttt import SCORES, AlphaBeta, TranspositionTable
+
+MAGIC = "TTB1"
+HEADER = struct.Struct("<4sBB")
+UNSOLVED = 0xFF
+
+DIGITS = {provided.EMPTY: 0, provided.PLAYERX: 1, provided.PLAYERO: 2}
+
+BOOK_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+_BOOKS = {}
+
+
+def book_path(dim, reverse, directory = BOOK_DIRECTORY):
+    """
+    Return the file name of the table for dim and reverse; misere
+    tables get their own file.
+    """
+    if reverse:
+        name = "ttt_book_%d_misere.bin" % dim
+    else:
+        name = "ttt_book_%d.bin" % dim
+    return os.path.join(directory, name)
+
+def position_index(board):
+    """
+    Return the base 3 index of a board.
+    """
+    dim = board.get_dim()
+    index = 0
+    for square in range(dim * dim - 1, -1, -1):
+        index = index * 3 + DIGITS[board.square(square // dim, square % dim)]
+    return index
+
+def _solve(board, player, table, transpositions):
+    """
+    Fill table with the entries of board, with player to move, and
+    of every unfinished position reachable from it.
+    """
+    index = position_index(board)
+    if table[index] != UNSOLVED:
+        return
+    value, square = AlphaBeta(board, player, transpositions).search()
+    table[index] = square << 2 | (value * SCORES[player] + 1)
+    for row, col in board.get_empty_squares():
+        child = board.clone()
+        child.move(row, col, player)
+        if child.check_win() == None:
+            _solve(child, provided.switch_player(player), table, transpositions)
+
+def build_book(dim, reverse, path = None):
+    """
+    Solve dim x dim Tic-Tac-Toe (misere if reverse) and write the
+    table to path, book_path(dim, reverse) by default.  Returns the
+    path.
+    """
+    if path is None:
+        path = book_path(dim, reverse)
+    table = bytearray([UNSOLVED]) * (3 ** (dim * dim))
+    _solve(provided.TTTBoard(dim, reverse), provided.PLAYERX, table,
+           TranspositionTable())
+    with open(path, "wb") as output:
+        output.write(HEADER.pack(MAGIC, dim, int(reverse)))
+        output.write(table)
+    return path
+
+class OpeningBook:
+    """
+    Memory-mapped solution table.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as source:
+            self._data = mmap.mmap(source.fileno(), 0, access = mmap.ACCESS_READ)
+        magic, self._dim, reverse = HEADER.unpack_from(self._data, 0)
+        self._reverse = bool(reverse)
+        if magic != MAGIC or len(self._data) != HEADER.size + 3 ** (self._dim * self._dim):
+            self._data.close()
+            raise ValueError("not a Tic-Tac-Toe book: " + path)
+
+    def lookup(self, board, player):
+        """
+        Return (score, move) like mm_move, or None if the board is not
+        in the table or player is not the player to move in it.
+        """
+        dim = board.get_dim()
+        if dim != self._dim or board.is_reverse() != self._reverse:
+            return None
+        squares = [board.square(square // dim, square % dim)
+                   for square in range(dim * dim)]
+        x_count = squares.count(provided.PLAYERX)
+        o_count = squares.count(provided.PLAYERO)
+        if player != (provided.PLAYERX if x_count == o_count else provided.PLAYERO):
+            return None
+        entry = ord(self._data[HEADER.size + position_index(board)])
+        if entry == UNSOLVED:
+            return None
+        square = entry >> 2
+        return ((entry & 3) - 1, (square // dim, square % dim))
+
+    def close(self):
+        """
+        Unmap the table.
+        """
+        self._data.close()
+
+def get_book(dim, reverse, directory = BOOK_DIRECTORY):
+    """
+    Return the OpeningBook for dim and reverse, mapping it on first
+    use, or None if it has not been built.  A missing book is looked
+    for again on the next call.
+    """
+    key = (dim, reverse, directory)
+    if key not in _BOOKS:
+        path = book_path(dim, reverse, directory)
+        if not os.path.exists(path):
+            return None
+        _BOOKS[key] = OpeningBook(path)
+    return _BOOKS[key]
+
+if __name__ == "__main__":
+    for REVERSE in (False, True):
+        print "Wrote", build_book(3, REVERSE)